@@ -0,0 +1,8 @@
+"""Benchmarks of the resume build pipeline.
+
+Synthetic resumes, whose number of entries and locales can be scaled far
+beyond the real data, are generated by `generate` and built by `run`, which
+times each stage of the build and stores results as JSON to compare them
+between commits. `importtime` checks that importing the builder stays within
+a time budget, slow dependencies being imported by the stages needing them.
+"""
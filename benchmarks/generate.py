@@ -0,0 +1,221 @@
+"""Generate synthetic resumes at several scales.
+
+A synthetic tree mimics the layout of the repository: its `data` directory is
+generated from the data of the existing locales, with lists of experiences,
+projects, education and volunteer entries repeated up to the requested
+number of entries and as many locales as requested, while `template`,
+`static`, `fonts`, `resume_builder` and `docs/assets` are links to the ones of
+the repository.
+
+Repeated entries get a unique name and description, so caches keyed by
+content, like the one of markdown conversions, are not hit more often than
+with real data.
+"""
+
+# Python Core Library
+# -----------------------------------------------------------------------------
+# https://docs.python.org/3/library/copy.html
+# Shallow and deep copy operations
+import copy
+
+# https://docs.python.org/3/library/os.html
+# Miscellaneous operating system interfaces
+import os
+import shutil
+
+# Third-Party Library
+# -----------------------------------------------------------------------------
+# https://pypi.org/project/PyYAML/
+# YAML parser and emitter for Python
+import yaml
+
+BASEDIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+# Locales of the synthetic resumes, the first ones being the real locales
+LOCALES = [
+    "en_US",
+    "fr_FR",
+    "de_DE",
+    "es_ES",
+    "it_IT",
+    "pt_PT",
+    "pt_BR",
+    "nl_NL",
+    "sv_SE",
+    "da_DK",
+    "nb_NO",
+    "fi_FI",
+    "pl_PL",
+    "cs_CZ",
+    "sk_SK",
+    "hu_HU",
+    "ro_RO",
+    "bg_BG",
+    "el_GR",
+    "tr_TR",
+    "ru_RU",
+    "uk_UA",
+    "lt_LT",
+    "lv_LV",
+    "et_EE",
+    "sl_SI",
+    "hr_HR",
+    "ca_ES",
+    "en_GB",
+    "ja_JP",
+    "zh_CN",
+    "ko_KR",
+]
+# Directories of the repository linked in synthetic trees
+LINKED = [
+    "template",
+    "static",
+    "fonts",
+    "resume_builder",
+    os.path.join("docs", "assets"),
+]
+# Data files storing lists of entries, with the key of the list
+SCALED = {
+    "experiences.yaml": ("experiences", "list"),
+    "projects.yaml": ("projects", "list"),
+    "education.yaml": ("education", None),
+    "volunteer.yaml": ("volunteer", "list"),
+}
+# Keys of entries made unique in repeated entries
+NAME_KEYS = ["name", "institution", "organization", "designation"]
+DESC_KEYS = ["html_desc", "pdf_desc", "description"]
+
+
+def scale_entries(entries: list, count: int) -> list:
+    """Repeat entries up to a number of entries.
+
+    Args:
+        entries: entries of the real data
+        count: number of entries to return
+
+    Returns:
+        List of `count` entries, repeated ones being made unique
+    """
+    scaled = []
+    for i_index in range(count):
+        entry = copy.deepcopy(entries[i_index % len(entries)])
+        if i_index >= len(entries):
+            make_unique(entry, i_index)
+        scaled.append(entry)
+    return scaled
+
+
+def make_unique(entry, index: int) -> None:
+    """Make names and descriptions of a repeated entry unique.
+
+    Args:
+        entry: entry, or part of it, to modify in place
+        index: index of the entry in the scaled list
+    """
+    if isinstance(entry, list):
+        for i_item in entry:
+            make_unique(i_item, index)
+    elif isinstance(entry, dict):
+        for key, value in entry.items():
+            if isinstance(value, str) and key in NAME_KEYS:
+                entry[key] = f"{value} #{index}"
+            elif isinstance(value, str) and key in DESC_KEYS:
+                entry[key] = f"{value}\n\nSynthetic entry {index}."
+            else:
+                make_unique(value, index)
+
+
+def load_yaml(path: str):
+    """Return the content of a YAML file.
+
+    Args:
+        path: path of the YAML file
+
+    Returns:
+        Content of the file
+    """
+    with open(path, "r", encoding="UTF-8") as yaml_file:
+        return yaml.load(yaml_file, Loader=yaml.SafeLoader)
+
+
+def dump_yaml(path: str, content) -> None:
+    """Write content into a YAML file.
+
+    Args:
+        path: path of the YAML file
+        content: content to write
+    """
+    with open(path, "w", encoding="UTF-8") as yaml_file:
+        yaml.dump(content, yaml_file, Dumper=yaml.SafeDumper, sort_keys=False)
+
+
+def generate(root: str, entries: int, locales: int) -> list:
+    """Generate a synthetic tree.
+
+    Args:
+        root: directory where the tree is generated, removed first if exists
+        entries: number of entries of each scaled list
+        locales: number of locales, at most `len(LOCALES)`
+
+    Returns:
+        List of the locale codes of the tree
+    """
+    if locales > len(LOCALES):
+        raise ValueError(f"At most {len(LOCALES)} locales can be generated")
+    if os.path.isdir(root):
+        shutil.rmtree(root)
+    os.makedirs(os.path.join(root, "docs"))
+    for i_dir in LINKED:
+        os.symlink(os.path.join(BASEDIR, i_dir), os.path.join(root, i_dir))
+    data_dir = os.path.join(root, "data")
+    os.makedirs(data_dir)
+    shutil.copy(os.path.join(BASEDIR, "data", "colors.yaml"), data_dir)
+
+    real = load_yaml(os.path.join(BASEDIR, "data", "locale.yaml"))["locale"]
+    codes = LOCALES[:locales]
+    locale_list = []
+    for i_index, i_code in enumerate(codes):
+        base = real[i_index % len(real)]
+        locale_list.append(
+            {
+                **base,
+                "code": i_code,
+                "shortcode": i_code.split("_")[1].lower(),
+                "html_lang": i_code.split("_")[0],
+            }
+        )
+        generate_locale(root, base["code"], i_code, entries)
+    dump_yaml(os.path.join(data_dir, "locale.yaml"), {"locale": locale_list})
+    return codes
+
+
+def generate_locale(root: str, base: str, code: str, entries: int) -> None:
+    """Generate data and translations of a synthetic locale.
+
+    Args:
+        root: directory of the synthetic tree
+        base: real locale the synthetic one is generated from
+        code: code of the synthetic locale
+        entries: number of entries of each scaled list
+    """
+    src = os.path.join(BASEDIR, "data", base)
+    dest = os.path.join(root, "data", code)
+    os.makedirs(dest)
+    for i_file in sorted(os.listdir(src)):
+        if i_file not in SCALED:
+            shutil.copy(os.path.join(src, i_file), dest)
+            continue
+        content = load_yaml(os.path.join(src, i_file))
+        key, list_key = SCALED[i_file]
+        if list_key:
+            content[key][list_key] = scale_entries(
+                content[key][list_key], entries
+            )
+        else:
+            content[key] = scale_entries(content[key], entries)
+        dump_yaml(os.path.join(dest, i_file), content)
+    messages_dir = os.path.join(root, "locale", code, "LC_MESSAGES")
+    os.makedirs(messages_dir)
+    shutil.copy(
+        os.path.join(BASEDIR, "locale", base, "LC_MESSAGES", "messages.po"),
+        messages_dir,
+    )
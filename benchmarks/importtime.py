@@ -0,0 +1,190 @@
+"""Check the import time of the builder against a budget.
+
+SYNOPSIS:
+
+    python -m benchmarks.importtime OPTIONS
+
+DESCRIPTION:
+
+    Import the builder several times in fresh interpreters with
+    `python -X importtime` and fail when the median of its cumulative import
+    time exceeds the budget, or when a module which should only be imported
+    by the stage needing it, like jinja2 or asyncio, is imported at startup.
+
+    Results are written as JSON, with the commit they were measured on and
+    the slowest modules imported.
+
+OPTIONS:
+
+    * --budget-ms: Maximum median import time of the builder, in
+                   milliseconds. (default: 150)
+    * --repeat: Number of imports measured. (default: 5)
+    * --top: Number of slowest modules reported. (default: 10)
+    * --output: File where results are written, printed if not set.
+"""
+
+# Python Core Library
+# -----------------------------------------------------------------------------
+# https://docs.python.org/3/library/argparse.html
+# Parser for command-line options, arguments and sub-commands
+import argparse
+
+# https://docs.python.org/3/library/statistics.html
+# Mathematical statistics functions
+import statistics
+
+# https://docs.python.org/3/library/subprocess.html
+# Subprocess management
+import subprocess
+
+# https://docs.python.org/3/library/sys.html
+# System-specific parameters and functions
+import sys
+
+# Local Library
+# -----------------------------------------------------------------------------
+# Generate synthetic resumes
+from benchmarks.generate import BASEDIR
+
+# Environment of the measures and writing of results
+from benchmarks.run import environment, write_results
+
+VERSION = 1
+# Module whose import time is checked
+MODULE = "main"
+# Modules only imported by the stage which needs them
+LAZY = [
+    "asyncio",
+    "babel",
+    "coloredlogs",
+    "concurrent.futures",
+    "dateutil",
+    "fontTools",
+    "jinja2",
+    "markdown",
+    "multiprocessing",
+    "yaml",
+]
+
+
+def measure() -> dict:
+    """Import the builder once in a fresh interpreter.
+
+    Returns:
+        Dictionary mapping every imported module to its cumulative import
+        time in microseconds
+    """
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {MODULE}"],
+        cwd=BASEDIR,
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stderr
+    modules = {}
+    for i_line in output.splitlines():
+        if not i_line.startswith("import time:") or "cumulative" in i_line:
+            continue
+        _, cumulative, name = i_line.split("|")
+        modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def run(args: argparse.Namespace) -> dict:
+    """Measure the import time of the builder.
+
+    Args:
+        args: parsed command line arguments
+
+    Returns:
+        Results of the measures, `passed` telling if the budget is met
+    """
+    measures = [measure() for _ in range(args.repeat)]
+    times = [i_measure[MODULE] / 1000 for i_measure in measures]
+    median = statistics.median(times)
+    eager = sorted(
+        i_module
+        for i_module in LAZY
+        if any(i_module in i_measure for i_measure in measures)
+    )
+    slowest = sorted(
+        measures[times.index(min(times))].items(),
+        key=lambda item: item[1],
+        reverse=True,
+    )
+    return {
+        "version": VERSION,
+        **environment(),
+        "budget_ms": args.budget_ms,
+        "median_ms": round(median, 3),
+        "min_ms": round(min(times), 3),
+        "eager": eager,
+        "slowest": [
+            {"module": name, "ms": round(cumulative / 1000, 3)}
+            for name, cumulative in slowest[1 : args.top + 1]
+        ],
+        "passed": median <= args.budget_ms and not eager,
+    }
+
+
+def parse_arg() -> argparse.Namespace:
+    """Parse arguments passed when calling the script from terminal.
+
+    Return:
+        argparse object which store arguments
+    """
+    parser = argparse.ArgumentParser(
+        prog="benchmarks.importtime",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+        description="""Check the import time of the builder against a
+            budget.""",
+    )
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=150,
+        help="""Maximum median import time of the builder, in
+            milliseconds.""",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="""Number of imports measured.""",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=10,
+        help="""Number of slowest modules reported.""",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="""File where results are written, printed if not set.""",
+    )
+    return parser.parse_args()
+
+
+def run_main():
+    """Check the import time budget from the command line."""
+    args = parse_arg()
+    results = run(args)
+    write_results(results, args.output)
+    if results["eager"]:
+        print(
+            f"Imported at startup: {', '.join(results['eager'])}",
+            file=sys.stderr,
+        )
+    if results["median_ms"] > args.budget_ms:
+        print(
+            f"Import time of {MODULE} is {results['median_ms']:.1f}ms, "
+            + f"above the budget of {args.budget_ms:.1f}ms",
+            file=sys.stderr,
+        )
+    sys.exit(0 if results["passed"] else 1)
+
+
+if __name__ == "__main__":
+    run_main()
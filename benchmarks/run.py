@@ -0,0 +1,371 @@
+"""Benchmark the resume build pipeline on synthetic resumes.
+
+SYNOPSIS:
+
+    python -m benchmarks.run OPTIONS
+
+DESCRIPTION:
+
+    Generate synthetic resumes for every combination of number of entries and
+    number of locales, build each of them several times and time every stage
+    of the build separately. The first build of a scale starts with an empty
+    cache directory, later ones reuse it.
+
+    Stages are timed by wrapping methods of the builder, the time of a stage
+    excluding the time of the stages it calls:
+
+    * catalogs: compilation of the gettext catalogs
+    * yaml: loading of the data files
+    * init_jinja_env: creation and initialization of jinja2 environments
+    * render: rendering and writing of the templates, including their
+      compilation and build manifest checks
+    * markdown: conversion of markdown descriptions
+    * assets: linking of static files into the output
+    * post_process: optional post-render stages of the html output
+    * latex: lualatex and ghostscript runs, only with `--latex`
+
+    Results are written as JSON, with the commit they were measured on, and
+    can be compared with the results of another commit.
+
+OPTIONS:
+
+    * --entries: Numbers of experiences, projects, education and volunteer
+                 entries of the synthetic resumes. (default: 10 100 1000)
+    * --locales: Numbers of locales of the synthetic resumes.
+                 (default: 2)
+    * --repeat: Number of builds of each synthetic resume. (default: 2)
+    * --latex: Also build PDF, which requires lualatex and ghostscript.
+    * --workdir: Directory where synthetic resumes are generated.
+                 (default: '.cache/benchmarks')
+    * --output: File where results are written as JSON, printed if not set.
+    * --compare: JSON results of a previous run to compare results with.
+"""
+
+# Python Core Library
+# -----------------------------------------------------------------------------
+# https://docs.python.org/3/library/argparse.html
+# Parser for command-line options, arguments and sub-commands
+import argparse
+
+# https://docs.python.org/3/library/collections.html
+# Container datatypes
+import collections
+
+# https://docs.python.org/3/library/datetime.html
+# Basic date and time types
+import datetime
+
+# https://docs.python.org/3/library/functools.html
+# Higher-order functions and operations on callable objects
+import functools
+
+# https://docs.python.org/3/library/json.html
+# JSON encoder and decoder
+import json
+
+# https://docs.python.org/3/library/logging.html
+# Logging facility for Python
+import logging
+
+# https://docs.python.org/3/library/os.html
+# Miscellaneous operating system interfaces
+import os
+
+# https://docs.python.org/3/library/platform.html
+# Access to underlying platform's identifying data
+import platform
+import subprocess
+
+# https://docs.python.org/3/library/sys.html
+# System-specific parameters and functions
+import sys
+
+# https://docs.python.org/3/library/time.html
+# Time access and conversions
+import time
+
+# Local Library
+# -----------------------------------------------------------------------------
+# Builder of the resume
+import main
+
+# Generate synthetic resumes
+from benchmarks.generate import BASEDIR, generate
+
+VERSION = 1
+
+
+# pylint: disable=R0903
+class StageTimer:
+    """Accumulate the time spent in each stage of a build."""
+
+    def __init__(self) -> None:
+        """Initialize StageTimer objects."""
+        self.times = collections.defaultdict(float)
+        self.children = []
+
+    def wrap(self, stage: str, func):
+        """Return a function timing calls of another one.
+
+        Time spent in other timed functions called by the function is only
+        accounted to their own stage.
+
+        Args:
+            stage: name of the stage the function belongs to
+            func: function to time
+
+        Returns:
+            Function calling `func` and timing it
+        """
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            self.children.append(0.0)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                self.times[stage] += elapsed - self.children.pop()
+                if self.children:
+                    self.children[-1] += elapsed
+
+        return timed
+
+
+def build(root: str, latex: bool) -> dict:
+    """Build a synthetic resume once and time its stages.
+
+    Args:
+        root: directory of the synthetic tree
+        latex: tell if PDF should be built
+
+    Returns:
+        Dictionary mapping each stage to its duration in seconds, `total`
+        being the duration of the whole build
+    """
+    builder_class = type(
+        "SyntheticResumeBuilder",
+        (main.ResumeBuilder,),
+        {"BASEDIR": root, "LOCALE_PATH": os.path.join(root, "locale")},
+    )
+    builder = builder_class(main.parse_arg(["--jobs", "1", "--quiet"]))
+    builder.logger.setLevel(logging.WARNING)
+    timer = StageTimer()
+    builder.catalogs.compile = timer.wrap("catalogs", builder.catalogs.compile)
+    builder.data_loader.load = timer.wrap("yaml", builder.data_loader.load)
+    builder.init_jinja_env = timer.wrap(
+        "init_jinja_env", builder.init_jinja_env
+    )
+    builder.build_type = timer.wrap("render", builder.build_type)
+    builder.markdown.convert = timer.wrap("markdown", builder.markdown.convert)
+    builder.init_output_dir = timer.wrap("assets", builder.init_output_dir)
+    builder.post_process_html = timer.wrap(
+        "post_process", builder.post_process_html
+    )
+    builder.run_pdf_jobs = timer.wrap("latex", builder.run_pdf_jobs)
+    start = time.perf_counter()
+    builder.build(html=True, pdf=latex, tex=True)
+    timings = {
+        stage: round(duration, 6) for stage, duration in timer.times.items()
+    }
+    timings["total"] = round(time.perf_counter() - start, 6)
+    return timings
+
+
+def commit() -> str:
+    """Return the commit of the repository, if any.
+
+    Returns:
+        Hash of the current commit, with a `-dirty` suffix if the working
+        tree is modified, or an empty string
+    """
+    try:
+        sha = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=BASEDIR,
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+        status = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=BASEDIR,
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+    return f"{sha}-dirty" if status else sha
+
+
+def environment() -> dict:
+    """Return the environment results are measured in.
+
+    Returns:
+        Dictionary storing the commit, date, Python version and platform
+    """
+    return {
+        "commit": commit(),
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+
+
+def run(args: argparse.Namespace) -> dict:
+    """Run the benchmarks.
+
+    Args:
+        args: parsed command line arguments
+
+    Returns:
+        Results of the benchmarks
+    """
+    results = []
+    for i_locales in args.locales:
+        for i_entries in args.entries:
+            root = os.path.join(
+                args.workdir, f"entries_{i_entries}-locales_{i_locales}"
+            )
+            generate(root, i_entries, i_locales)
+            for i_run in range(args.repeat):
+                timings = build(root, args.latex)
+                results.append(
+                    {
+                        "entries": i_entries,
+                        "locales": i_locales,
+                        "run": i_run,
+                        "cache": "cold" if i_run == 0 else "warm",
+                        "stages": timings,
+                    }
+                )
+                print(
+                    f"entries={i_entries:<5} locales={i_locales:<3} "
+                    + f"run={i_run} total={timings['total']:.3f}s",
+                    file=sys.stderr,
+                )
+    return {
+        "version": VERSION,
+        **environment(),
+        "latex": args.latex,
+        "results": results,
+    }
+
+
+def compare(previous: dict, current: dict) -> None:
+    """Print the ratio between timings of two benchmark results.
+
+    Args:
+        previous: results of the reference run
+        current: results of the new run
+    """
+    reference = {
+        (i["entries"], i["locales"], i["run"]): i["stages"]
+        for i in previous["results"]
+    }
+    print(
+        f"Comparing {current['commit'] or 'current'} with "
+        + f"{previous['commit'] or 'previous'} (new / old):"
+    )
+    for i_result in current["results"]:
+        key = (i_result["entries"], i_result["locales"], i_result["run"])
+        if key not in reference:
+            continue
+        ratios = ", ".join(
+            f"{stage}={duration / reference[key][stage]:.2f}"
+            for stage, duration in i_result["stages"].items()
+            if reference[key].get(stage)
+        )
+        print(f"  entries={key[0]} locales={key[1]} run={key[2]}: {ratios}")
+
+
+def parse_arg() -> argparse.Namespace:
+    """Parse arguments passed when calling the script from terminal.
+
+    Return:
+        argparse object which store arguments
+    """
+    parser = argparse.ArgumentParser(
+        prog="benchmarks.run",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+        description="""Benchmark the resume build pipeline on synthetic
+            resumes.""",
+    )
+    parser.add_argument(
+        "--entries",
+        type=int,
+        nargs="+",
+        default=[10, 100, 1000],
+        help="""Numbers of experiences, projects, education and volunteer
+            entries of the synthetic resumes.""",
+    )
+    parser.add_argument(
+        "--locales",
+        type=int,
+        nargs="+",
+        default=[2],
+        help="""Numbers of locales of the synthetic resumes.""",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=2,
+        help="""Number of builds of each synthetic resume.""",
+    )
+    parser.add_argument(
+        "--latex",
+        action="store_true",
+        default=False,
+        help="""Also build PDF, which requires lualatex and ghostscript.""",
+    )
+    parser.add_argument(
+        "--workdir",
+        type=str,
+        default=os.path.join(BASEDIR, ".cache", "benchmarks"),
+        help="""Directory where synthetic resumes are generated.""",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="""File where results are written as JSON, printed if not
+            set.""",
+    )
+    parser.add_argument(
+        "--compare",
+        type=str,
+        default=None,
+        help="""JSON results of a previous run to compare results with.""",
+    )
+    return parser.parse_args()
+
+
+def write_results(results: dict, path: str = None) -> None:
+    """Write results as JSON.
+
+    Args:
+        results: results of the benchmarks
+        path: file where results are written, printed if None
+    """
+    if path:
+        with open(path, "w", encoding="UTF-8") as output_file:
+            json.dump(results, output_file, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+
+def run_main():
+    """Run the benchmarks from the command line."""
+    args = parse_arg()
+    results = run(args)
+    write_results(results, args.output)
+    if args.compare:
+        with open(args.compare, "r", encoding="UTF-8") as compare_file:
+            compare(json.load(compare_file), results)
+
+
+if __name__ == "__main__":
+    run_main()
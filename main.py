@@ -23,11 +23,57 @@ OPTIONS:
                   render the html pages.
                   Is incompatible with option `--build pdf` as this will only
                   build pdf so there is nothing to be erved
+    * --watch,-w: Once building of resume is done, rebuild outputs depending on
+                  files changed in `data`, `template`, `static` and `locale`
+                  and, when html is built, serve it and reload pages once
+                  rebuilt.
+    * --port,-p: Port on which html pages are served by `--serve` and
+                 `--watch`. (default: 8080)
     * --verbosity,-v: Increase output verbosity (error, warning, info, debug
                       respectively depending on the number of `v`).
     * --quiet,-q: Do now show LaTeX and Ghostscript output
+    * --incremental,-i: Do not clean the output directory and only rebuild
+                        outputs whose inputs changed since the last build.
+    * --jobs,-j: Number of processes used to build locales and build types
+                 in parallel, `0` to use all the CPUs. (default: 1)
+    * --tex-jobs: Maximum number of lualatex and Ghostscript processes run
+                  concurrently. (default: number of CPUs)
+    * --tex-timeout: Maximum duration, in seconds, of a single lualatex or
+                     Ghostscript run. (default: 600)
+    * --build-date: Date and time, in ISO 8601 format and UTC if no offset is
+                    given, the build is pinned to instead of the current time,
+                    like `SOURCE_DATE_EPOCH` which is used when not set.
+    * --cache-dir: Location of the directory where data reused between builds,
+                   like LaTeX auxiliary files, are stored. (default: '.cache/')
+    * --artifact-cache: Location of a cache of rendered files and compiled
+                        PDF shared between builds and machines, like CI
+                        runners, either a directory or an HTTP URL accepting
+                        `GET` and `PUT` requests. (default: disabled)
+    * --warm-tex-cache: Before building PDF, build the luaotfload font names
+                        database in the cache directory.
+    * --tex-format: Dump the preamble of each LaTeX document into a format
+                    reused by later compilations (requires `mylatexformat`).
+    * --subset-fonts: Subset webfonts of the html output to the characters and
+                      icons used by the pages, as woff2 only (requires
+                      `fonttools[woff]`).
+    * --optimize-html: Purge unused selectors of the CSS libraries, inline the
+                       critical CSS of each page and minify html and CSS.
+    * --fingerprint-assets: Publish stylesheets and scripts of the html output
+                            under names including their content hash, listed
+                            in `assets.json`, so they can be cached forever.
+    * --profile: Print the time spent in each stage of the build, like the
+                 rendering of templates or lualatex runs, once the build is
+                 done.
+    * --trace: Write the timing spans of the build stages, tagged with their
+               locale and build type, as a Chrome trace event JSON file.
+    * --cprofile: Profile the Python code of the main process with cProfile
+                  and write the statistics in a `.prof` file.
 """
 
+# pylint: disable=C0302
+
+from __future__ import annotations
+
 # Python Core Library
 # -----------------------------------------------------------------------------
 # https://docs.python.org/3/library/argparse.html
@@ -38,13 +84,17 @@ import argparse
 # Basic date and time types
 import datetime
 
+# https://docs.python.org/3/library/functools.html
+# Higher-order functions and operations on callable objects
+import functools
+
 # https://docs.python.org/3/library/gettext.html
 # Multilingual internationalization services
 import gettext
 
-# https://docs.python.org/3/library/locale.html
-# Internationalization services
-import locale
+# https://docs.python.org/3/library/json.html
+# JSON encoder and decoder
+import json
 
 # https://docs.python.org/3/library/logging.html
 # Logging facility for Python
@@ -56,48 +106,108 @@ import os
 import shutil
 import subprocess
 
-# https://pypi.org/project/coloredlogs/
-# Colored terminal output for Python's logging module
-import coloredlogs
+# https://docs.python.org/3/library/typing.html
+# Support for type hints
+from typing import TYPE_CHECKING
 
-# A very fast and expressive template engine.
-import jinja2
+# Local Library
+# -----------------------------------------------------------------------------
+# Link static assets into outputs from a content-addressed store
+from resume_builder.assets import AssetStore, write_file, write_stream
 
-# https://pypi.org/project/Markdown/
-# Python implementation of Markdown.
-import markdown
+# Compile and load gettext catalogs in process
+from resume_builder.catalogs import Catalogs
 
-# Third-Party Library
-# -----------------------------------------------------------------------------
-# https://pypi.org/project/PyYAML/
-# YAML parser and emitter for Python
-import yaml
+# Load YAML data files with libyaml and a cache of parsed files
+from resume_builder.data import DataLoader
+
+# Precompute dates and durations of resume entries
+from resume_builder.dates import add_dates, build_clock, format_date
+
+# Subset webfonts to the glyphs used by html pages
+from resume_builder.fonts import FontSubsetter
+
+# Compile LaTeX files with as few lualatex runs as possible
+from resume_builder.latex import LatexDriver, tex_environment
+
+# Record build inputs and outputs to support incremental builds
+from resume_builder.manifest import BuildManifest, OutputChanges, state_dir
+
+# Convert markdown descriptions into html
+from resume_builder.markup import MarkdownRenderer
 
-# https://pypi.org/project/Babel/
-# Internationalization utilities
-from babel.support import Translations
+# Purge, inline critical CSS and minify html output
+from resume_builder.optimize import HtmlOptimizer, output_files
 
-# https://pypi.org/project/python-dateutil/
-# Extensions to the standard Python datetime module
-from dateutil.relativedelta import relativedelta
+# Record timing spans of the build stages
+from resume_builder.profiling import Profiler
 
-# from yaml import dump, load
-# try:
-#     from yaml import CDumper as Dumper
-#     from yaml import CLoader as Loader
-# except ImportError:
-#     from yaml import Dumper, Loader
+# Run lualatex and ghostscript concurrently
+from resume_builder.scheduler import JobError, JobScheduler
 
+# Modules which are slow to import, like jinja2, markdown, yaml, babel or
+# asyncio, are only imported by the stage which needs them, so that `--help`
+# or an incremental build with nothing to do start quickly, see the import time
+# budget checked by `benchmarks/importtime.py`.
+
+
+if TYPE_CHECKING:
+    # Only imported by type checkers, see lazy imports above
+    import multiprocessing
+
+    import jinja2
+    from dateutil.relativedelta import relativedelta
 
 _ = gettext.gettext
 
 
+# pylint: disable=R0902,R0904
 class ResumeBuilder:
     """Main class which expose method to buid the resume."""
 
     BASEDIR = os.path.dirname(os.path.realpath(__file__))
     LOCALE_PATH = os.path.join(BASEDIR, "locale")
     LOG_FORMAT = "%(asctime)s [%(levelname)s] %(name)s - %(message)s"
+    MARKDOWN_EXTENSIONS = [
+        "md_in_html",
+        "admonition",
+        "abbr",
+        "tables",
+        "attr_list",
+    ]
+    # Extensions of html assets published under a fingerprinted name
+    ASSET_EXTENSIONS = (".css", ".js")
+    # LaTeX entry points, each one is rendered and compiled for a locale when
+    # the data of the locale define its layout
+    TEX_TARGETS = [
+        {"template": "resume.tex.j2", "output": "resume.tex", "layout": "pdf"},
+        {
+            "template": "resume_ats.tex.j2",
+            "output": "resume_ats.tex",
+            "layout": "pdf_ats",
+        },
+    ]
+    # Outputs which do not depend on the locale, per build type, mapping
+    # template to render to the output file relative to the build type
+    # directory. They are rendered once per build by the `SHARED_UNIT` unit,
+    # with the data of the default locale. They must not be shipped in
+    # `static`, which is synchronised into the output directory by every
+    # build and would overwrite them.
+    SHARED_OUTPUTS = {
+        "html": {
+            "style.css.j2": os.path.join("css", "style.css"),
+            "redirect.html.j2": "index.html",
+        },
+    }
+    SHARED_UNIT = "shared"
+    # Python packages whose version is part of the key of rendered artifacts
+    ARTIFACT_PACKAGES = [
+        "Babel",
+        "Jinja2",
+        "Markdown",
+        "PyYAML",
+        "python-dateutil",
+    ]
 
     def __init__(self, args: argparse) -> None:
         """Initialize ResumeBuilder objects.
@@ -105,15 +215,66 @@ class ResumeBuilder:
         Args:
             args: argparse object storing argument for process the build of the resume
         """
-        self.redirect_build = False
+        self.default_locale = None
+        # Clock of the build, read once so every output uses the same date
+        self.now, self.source_date_epoch = build_clock(args.build_date)
         self.config = {}
         self.output_dir = os.path.join(self.BASEDIR, args.output_dir)
+        self.cache_dir = os.path.join(self.BASEDIR, args.cache_dir)
+        self.tex_env = tex_environment(
+            self.cache_dir,
+            os.path.join(self.BASEDIR, "fonts"),
+            self.source_date_epoch,
+        )
+        self.warm_tex = args.warm_tex_cache
+        self.tex_format = args.tex_format
+        self.subset_fonts = args.subset_fonts
+        self.optimize_html = args.optimize_html
+        self.fingerprint_assets = args.fingerprint_assets
+        self.asset_store = AssetStore(os.path.join(self.cache_dir, "assets"))
+        self.data_loader = DataLoader(os.path.join(self.cache_dir, "data"))
+        self.jinja_envs = {}
+        # Created with the first jinja2 environment, see `create_jinja_env`
+        self.fragments = None
+        self.markdown = MarkdownRenderer(
+            self.MARKDOWN_EXTENSIONS, os.path.join(self.cache_dir, "markdown")
+        )
         self.quiet = args.quiet
+        self.incremental = args.incremental
+        self.jobs = args.jobs if args.jobs > 0 else os.cpu_count()
+        build_state_dir = state_dir(self.cache_dir, self.output_dir)
+        self.manifest = BuildManifest(
+            build_state_dir, self.output_dir, self.BASEDIR
+        )
+        self.output_changes = OutputChanges(build_state_dir, self.output_dir)
         logging.basicConfig(format=self.LOG_FORMAT)
         self.logger = logging.getLogger("ResumeBuilder")
+        # pylint: disable=C0415
+        import coloredlogs
+
         coloredlogs.install(
             level=set_log_verbosity(args.verbosity), logger=self.logger
         )
+        self.catalogs = Catalogs(self.LOCALE_PATH, self.logger)
+        self.profiler = Profiler(args.profile or bool(args.trace))
+        self.artifacts = None
+        if args.artifact_cache:
+            # pylint: disable=C0415
+            from resume_builder.artifacts import ArtifactCache, open_backend
+
+            self.artifacts = ArtifactCache(
+                open_backend(args.artifact_cache),
+                self.logger,
+                os.path.join(self.cache_dir, "artifacts.json"),
+            )
+        self.scheduler = JobScheduler(
+            self.logger,
+            concurrency=args.tex_jobs,
+            timeout=args.tex_timeout,
+            quiet=args.quiet,
+            profiler=self.profiler,
+            artifacts=self.artifacts,
+        )
 
     @staticmethod
     def location(location: {}, city=True) -> str:
@@ -162,27 +323,35 @@ class ResumeBuilder:
         """
         return datetime.date.fromisoformat(date)
 
-    @staticmethod
-    def now_date() -> datetime:
+    def now_date(self) -> datetime:
         """Return the current date as datetime object.
 
+        The date is pinned when the builder is created so every output of the
+        build uses the same one, see `build_clock()`.
+
         Returns:
             Current date as datetime object
         """
-        return datetime.datetime.now()
+        return self.now
 
     @staticmethod
-    def format_date(date: datetime, str_format: str = "%B %Y") -> datetime:
+    def format_date(
+        date: datetime, str_format: str = "%B %Y", curr_locale: str = "en_US"
+    ) -> str:
         """Format a datetime object into specified format.
 
+        Month and day names are the ones of the given locale, whatever the
+        locale of the process.
+
         Args:
             date: datetime object
             str_format: output format of the date (default "%B %Y")
+            curr_locale: locale used to format the date (default "en_US")
 
         Returns:
             String of the formated date
         """
-        return date.strftime(str_format)
+        return format_date(date, str_format, curr_locale)
 
     @staticmethod
     def relative_delta_date(end: datetime, start: datetime) -> relativedelta:
@@ -195,12 +364,17 @@ class ResumeBuilder:
         Returns:
             time
         """
+        # pylint: disable=C0415
+        from dateutil.relativedelta import relativedelta
+
         return relativedelta(end, start)
 
     @staticmethod
-    @jinja2.pass_context
     def get_context(context):
-        """Get the jinja2 context."""
+        """Get the jinja2 context.
+
+        Registered with `jinja2.pass_context()` by `create_jinja_env()`.
+        """
         return context
 
     @staticmethod
@@ -216,37 +390,33 @@ class ResumeBuilder:
         """
         return context[string]
 
-    @staticmethod
-    def to_html(string: str) -> str:
+    def to_html(self, string: str) -> str:
         """Convert markdown string into html.
 
+        Conversions are memoized, in memory and in the cache directory.
+
         Args:
             string: markdown string to be converted into html
 
         Returns:
             html of from the markdown string
         """
-        return markdown.markdown(
-            string,
-            extensions=[
-                "md_in_html",
-                "admonition",
-                "abbr",
-                "tables",
-                "attr_list",
-            ],
-        )
+        return self.markdown.convert(string)
 
     def parse_config(self) -> None:
         """Parse configuration files and update class dictionary."""
         all_locale = {}
         colors = {}
-        curr_file = os.path.join(self.BASEDIR, "data", "locale.yaml")
-        with open(curr_file, "r", encoding="UTF-8") as config_file:
-            all_locale.update(yaml.load(config_file, Loader=yaml.SafeLoader))
-        curr_file = os.path.join(self.BASEDIR, "data", "colors.yaml")
-        with open(curr_file, "r", encoding="UTF-8") as config_file:
-            colors.update(yaml.load(config_file, Loader=yaml.SafeLoader))
+        all_locale.update(
+            self.data_loader.load(
+                os.path.join(self.BASEDIR, "data", "locale.yaml")
+            )
+        )
+        colors.update(
+            self.data_loader.load(
+                os.path.join(self.BASEDIR, "data", "colors.yaml")
+            )
+        )
         self.config = {}
         self.config.update(all_locale)
         for i_locale in self.config["locale"]:
@@ -256,18 +426,31 @@ class ResumeBuilder:
             }
             self.config[i_locale["code"]].update(colors)
 
-    def init_jinja_env(
-        self, build_type: str, curr_locale: str
-    ) -> jinja2.Environment:
-        """Initialize jinja2 environment.
+    def create_jinja_env(self, build_type: str) -> jinja2.Environment:
+        """Create the jinja2 environment of a template family.
+
+        Compiled templates are cached in the cache directory, keyed by their
+        source, so they are only compiled again when they change.
 
         Args:
             build_type: string defining the current build done (html, pdf, tex)
-            curr_locale: current locale used for the build (like en_US)
 
         Returns:
-            Initialized jinja2 environment
+            Jinja2 environment, without locale nor translations installed
+
+        Raises:
+            ValueError: if the build type is unknown
         """
+        # pylint: disable=C0415
+        import jinja2
+        from resume_builder.fragments import FragmentCache
+        from resume_builder.templates import BytecodeCache, DependencyLoader
+
+        if self.fragments is None:
+            self.fragments = FragmentCache(
+                os.path.join(self.cache_dir, "fragments")
+            )
+        bytecode_cache = BytecodeCache(os.path.join(self.cache_dir, "jinja"))
         if build_type == "html":
             jinja_env = jinja2.Environment(
                 extensions=[
@@ -277,9 +460,10 @@ class ResumeBuilder:
                 ],
                 trim_blocks=False,
                 autoescape=False,
-                loader=jinja2.FileSystemLoader(
+                loader=DependencyLoader(
                     os.path.join(self.BASEDIR, "template", "html")
                 ),
+                bytecode_cache=bytecode_cache,
             )
         elif build_type in ["pdf", "tex"]:
             jinja_env = jinja2.Environment(
@@ -296,60 +480,121 @@ class ResumeBuilder:
                 comment_end_string="#]",
                 trim_blocks=False,
                 autoescape=False,
-                loader=jinja2.FileSystemLoader(
+                loader=DependencyLoader(
                     os.path.join(self.BASEDIR, "template", "tex")
                 ),
+                bytecode_cache=bytecode_cache,
             )
+        else:
+            raise ValueError(f"Unknown build type `{build_type}`")
         # pylint: disable=E1101
         jinja_env.install_gettext_callables(
             gettext=gettext.gettext, ngettext=gettext.ngettext, newstyle=True
         )
         jinja_env.globals["location"] = self.location
-        jinja_env.globals["format_date"] = self.format_date
         jinja_env.globals["iso_date"] = self.iso_date
         jinja_env.globals["now_date"] = self.now_date
         jinja_env.globals["relative_delta_date"] = self.relative_delta_date
         jinja_env.globals["subs"] = self.subs
-        jinja_env.globals["context"] = self.get_context
+        jinja_env.globals["context"] = jinja2.pass_context(self.get_context)
         jinja_env.globals["to_html"] = self.to_html
+        return jinja_env
+
+    def init_jinja_env(
+        self, build_type: str, curr_locale: str
+    ) -> jinja2.Environment:
+        """Initialize jinja2 environment.
+
+        One environment is created per template family, i.e. html or tex, and
+        reused for every locale, only the locale and the translations being
+        swapped before rendering, so templates are loaded once per build.
+
+        Args:
+            build_type: string defining the current build done (html, pdf, tex)
+            curr_locale: current locale used for the build (like en_US)
+
+        Returns:
+            Initialized jinja2 environment
+        """
+        family = "html" if build_type == "html" else "tex"
+        if family not in self.jinja_envs:
+            self.jinja_envs[family] = self.create_jinja_env(build_type)
+        jinja_env = self.jinja_envs[family]
+        # Imported templates, like `macro.html.j2`, cache their module which
+        # holds the translations and the namespace of the previous locale
+        for i_template in jinja_env.cache.values():
+            # pylint: disable=W0212
+            i_template._module = None
         jinja_env.globals["locale"] = curr_locale
+        jinja_env.globals["format_date"] = functools.partial(
+            self.format_date, curr_locale=curr_locale
+        )
+        # Sections rendered with `fragment()` are reused while the locale,
+        # its translations, the pinned date and the code are the same
+        jinja_env.globals["fragment"] = self.fragments.bind(
+            f"{curr_locale}\0{self.now.date().isoformat()}",
+            [
+                *self.code_files(),
+                self.catalogs.path(curr_locale, "mo"),
+            ],
+        )
         # Load the translations for the current locale
-        translations = Translations.load(self.LOCALE_PATH, [curr_locale])
-        locale.setlocale(locale.LC_ALL, f"{curr_locale}.UTF-8")
+        translations = self.catalogs.translations(curr_locale)
         # pylint: disable=E1101
         jinja_env.install_gettext_translations(translations)
         return jinja_env
 
-    def compile_pdf(self, files: dict, curr_locale: str) -> None:
-        """Compile pdf resume using lualatex and ghostscript.
+    def compile_pdf(self, files: dict, curr_locale: str) -> list:
+        """Schedule compilation of pdf resume using lualatex and ghostscript.
+
+        Commands are not run right away, they are added to the scheduler which
+        runs the jobs of every locale concurrently once all of them are
+        rendered, see `run_pdf_jobs()`.
 
         Args:
             files: dictionary storing files to use to build the pdf
             curr_locale: current locale used for the build (like en_US)
+
+        Returns:
+            List of the PDF files which will be produced
         """
+        outputs = []
         pdf_output_dir = os.path.join(self.output_dir, "pdf")
         html_output_dir = os.path.join(
             self.output_dir, "html", "assets", "pdf", curr_locale
         )
         if not os.path.exists(html_output_dir):
             os.makedirs(html_output_dir)
-        os.chdir(pdf_output_dir)
+        # LaTeX is run from the pdf output directory, where the document class
+        # and assets are, but each locale writes its auxiliary files and PDF
+        # in its own directory so locales can be compiled concurrently.
         for i_file in files:
             i_file_tex = os.path.join(curr_locale, files[i_file])
-            i_file_pdf = os.path.join(files[i_file].replace(".tex", ".pdf"))
+            i_file_pdf = i_file_tex.replace(".tex", ".pdf")
             i_file_pdf_bw = i_file_pdf.replace(".pdf", ".bw.pdf")
-            # pylint: disable=W1203
-            self.logger.info(f"Compiling latex PDF for locale {curr_locale}.")
-            cmd = ["lualatex", i_file_tex]
-            if self.quiet:
-                subprocess.run(cmd, capture_output=True, check=True)
-            else:
-                subprocess.run(cmd, check=True)
-            # pylint: disable=W1203
-            self.logger.info(
-                f"Converting PDF to Black & White {curr_locale}.",
+            name = self.config[curr_locale]["basics"]["name"]
+            dest_filename = (
+                f"{name.replace(' ','_')}"
+                + "_"
+                + f"{os.path.join(files[i_file].replace('.tex','.pdf'))}"
+            )
+            dest_filename_bw = (
+                f"{name.replace(' ','_')}"
+                + "_"
+                + f"{os.path.join(files[i_file].replace('.tex','.bw.pdf'))}"
+            )
+            lualatex_cmd = LatexDriver(
+                i_file_tex,
+                cwd=pdf_output_dir,
+                output_dir=curr_locale,
+                cache_dir=os.path.join(self.cache_dir, "latex", curr_locale),
+                format_dir=(
+                    os.path.join(self.cache_dir, "formats", curr_locale)
+                    if self.tex_format
+                    else None
+                ),
             )
-            cmd = [
+            gs_cmd = [
                 "gs",
                 f"-sOutputFile={i_file_pdf_bw}",
                 "-sDEVICE=pdfwrite",
@@ -360,107 +605,440 @@ class ResumeBuilder:
                 "-dBATCH",
                 i_file_pdf,
             ]
-            if self.quiet:
-                subprocess.run(cmd, capture_output=True, check=True)
-            else:
-                subprocess.run(cmd, check=True)
-            self.logger.info("Moving all PDF to the right place")
-            dest_filename = (
-                f"{self.config[curr_locale]['basics']['name'].replace(' ','_')}"
-                + "_"
-                + f"{os.path.join(files[i_file].replace('.tex','.pdf'))}"
-            )
-            dest_filename_bw = (
-                f"{self.config[curr_locale]['basics']['name'].replace(' ','_')}"
-                + "_"
-                + f"{os.path.join(files[i_file].replace('.tex','.bw.pdf'))}"
-            )
-            shutil.copy(
-                i_file_pdf,
-                os.path.join(pdf_output_dir, curr_locale, dest_filename),
-            )
-            shutil.copy(
-                i_file_pdf_bw,
-                os.path.join(pdf_output_dir, curr_locale, dest_filename_bw),
+            # PDF only depend on the rendered tex file, the document classes,
+            # assets and fonts, the versions of lualatex and gs, and the
+            # pinned clock embedded in their metadata
+            artifacts = {
+                "spec": {
+                    "files": {
+                        "tex": os.path.join(pdf_output_dir, i_file_tex),
+                        "static/pdf": os.path.join(
+                            self.BASEDIR, "static", "pdf"
+                        ),
+                        "docs/assets": os.path.join(
+                            self.BASEDIR, "docs", "assets"
+                        ),
+                        "fonts": os.path.join(self.BASEDIR, "fonts"),
+                        "resume_builder/latex.py": os.path.join(
+                            self.BASEDIR, "resume_builder", "latex.py"
+                        ),
+                    },
+                    "tools": ["lualatex", "gs"],
+                    "values": [
+                        i_file_tex,
+                        gs_cmd,
+                        self.tex_format,
+                        self.source_date_epoch,
+                    ],
+                },
+                "base": pdf_output_dir,
+                "outputs": [
+                    os.path.join(pdf_output_dir, i_file_pdf),
+                    os.path.join(pdf_output_dir, i_file_pdf_bw),
+                ],
+            }
+            i_file_pdf = os.path.join(pdf_output_dir, i_file_pdf)
+            i_file_pdf_bw = os.path.join(pdf_output_dir, i_file_pdf_bw)
+            self.scheduler.add(
+                i_file_tex,
+                [
+                    (
+                        f"Compiling latex PDF for locale {curr_locale}.",
+                        lualatex_cmd,
+                    ),
+                    (
+                        f"Converting PDF to Black & White {curr_locale}.",
+                        gs_cmd,
+                    ),
+                ],
+                cwd=pdf_output_dir,
+                moves=[
+                    (
+                        "copy",
+                        i_file_pdf,
+                        os.path.join(
+                            pdf_output_dir, curr_locale, dest_filename
+                        ),
+                    ),
+                    (
+                        "copy",
+                        i_file_pdf_bw,
+                        os.path.join(
+                            pdf_output_dir, curr_locale, dest_filename_bw
+                        ),
+                    ),
+                    (
+                        "move",
+                        i_file_pdf,
+                        os.path.join(html_output_dir, dest_filename),
+                    ),
+                    (
+                        "move",
+                        i_file_pdf_bw,
+                        os.path.join(html_output_dir, dest_filename_bw),
+                    ),
+                ],
+                unit=("pdf", curr_locale),
+                env=self.tex_env,
+                artifacts=artifacts if self.artifacts else None,
             )
-            shutil.move(
-                i_file_pdf, os.path.join(html_output_dir, dest_filename)
+            pdf_locale_dir = os.path.join(pdf_output_dir, curr_locale)
+            outputs.extend(
+                [
+                    os.path.join(pdf_locale_dir, dest_filename),
+                    os.path.join(pdf_locale_dir, dest_filename_bw),
+                    os.path.join(html_output_dir, dest_filename),
+                    os.path.join(html_output_dir, dest_filename_bw),
+                ]
             )
-            shutil.move(
-                i_file_pdf_bw, os.path.join(html_output_dir, dest_filename_bw)
+        return outputs
+
+    def warm_tex_cache(self) -> None:
+        """Build the luaotfload font names database in the cache directory.
+
+        Later lualatex runs, which use the same environment, then no longer
+        need to index the fonts of the host and of the repository.
+        """
+        self.logger.info("Building luaotfload font names database.")
+        cmd = ["luaotfload-tool", "--update"]
+        if self.quiet:
+            subprocess.run(
+                cmd, env=self.tex_env, capture_output=True, check=True
             )
+        else:
+            subprocess.run(cmd, env=self.tex_env, check=True)
+
+    def run_pdf_jobs(self) -> None:
+        """Run lualatex and ghostscript jobs scheduled for every locale.
+
+        Units whose jobs did not complete are removed from the manifest so
+        they are rebuilt by the next incremental build.
+        """
+        jobs = list(self.scheduler.jobs)
+        try:
+            self.scheduler.run()
+        except JobError as error:
+            for i_line in error.output:
+                self.logger.error(i_line)
+            # pylint: disable=W1203
+            self.logger.error(f"PDF build failed for {error}")
+            raise
+        finally:
+            for i_job in jobs:
+                if i_job["label"] not in self.scheduler.completed:
+                    self.manifest.forget(*i_job["unit"])
 
     def init_output_dir(self, build_type: str) -> None:
         """Initialize output directory, i.e. create directory.
 
+        Static files are linked from the asset store rather than copied.
+        Initialization is done once per build type, before building any
+        locale, so parallel workers never link the same static files
+        concurrently.
+
         Args:
             build_type: string defining the current build done (html, pdf, tex)
         """
         static_dir = os.path.join(self.BASEDIR, "static", build_type)
         if not os.path.exists(os.path.join(self.output_dir, build_type)):
             os.makedirs(os.path.join(self.output_dir, build_type))
+        # Rendered outputs are never overwritten by static files, even when
+        # their unit is skipped by an incremental build
+        exclude = set(self.SHARED_OUTPUTS.get(build_type, {}).values())
+        # Complete webfonts are replaced by their subsets, see
+        # `subset_webfonts()`
+        if build_type == "html" and self.subset_fonts:
+            exclude.add(os.path.join("css", "webfonts"))
         for i_node in os.listdir(static_dir):
+            if i_node in exclude:
+                continue
             src = os.path.join(static_dir, i_node)
             dest = os.path.join(self.output_dir, build_type, i_node)
-            if not os.path.exists(dest):
-                if os.path.isdir(src):
-                    shutil.copytree(src, dest)
-                else:
-                    shutil.copy(src, dest)
+            self.asset_store.sync_tree(
+                src,
+                dest,
+                [
+                    os.path.relpath(i_path, i_node)
+                    for i_path in exclude
+                    if i_path.startswith(i_node + os.sep)
+                ],
+            )
         src = os.path.join(self.BASEDIR, "docs", "assets")
         for i_node in os.listdir(src):
             dest = os.path.join(self.output_dir, build_type, "assets", i_node)
-            if not os.path.exists(dest):
-                shutil.copytree(os.path.join(src, i_node), dest)
+            self.asset_store.sync_tree(os.path.join(src, i_node), dest)
+
+    def tex_targets(self, curr_locale: str) -> dict:
+        """Return the LaTeX entry points to build for a locale.
+
+        A target is built when the data of the locale define its layout, for
+        instance the ATS variant of the resume is built when `pdf_ats` is
+        defined.
+
+        Args:
+            curr_locale: current locale used for the build (like en_US)
+
+        Returns:
+            Dictionary mapping template to render to the output tex file
+        """
+        return {
+            i_target["template"]: i_target["output"]
+            for i_target in self.TEX_TARGETS
+            if self.config[curr_locale].get(i_target["layout"])
+        }
+
+    def code_files(self) -> list:
+        """Return the files of the code of the builder.
+
+        Returns:
+            List of files path
+        """
+        package_dir = os.path.join(self.BASEDIR, "resume_builder")
+        return [
+            os.path.realpath(__file__),
+            *[
+                os.path.join(package_dir, i_file)
+                for i_file in sorted(os.listdir(package_dir))
+                if i_file.endswith(".py")
+            ],
+        ]
+
+    def unit_inputs(self, build_type: str, curr_locale: str) -> list:
+        """Return files and directories a build unit depends on.
+
+        Templates are not listed here as they are discovered while rendering.
+        Shared outputs only depend on the code, the locale list, the colors
+        and the translations of the default locale.
+
+        Args:
+            build_type: string defining the current build done (html, pdf, tex)
+            curr_locale: current locale used for the build (like en_US), or
+                         `SHARED_UNIT`
+
+        Returns:
+            List of files and directories path
+        """
+        shared = curr_locale == self.SHARED_UNIT
+        translated = self.default_locale if shared else curr_locale
+        inputs = [
+            *self.code_files(),
+            os.path.join(self.BASEDIR, "data", "locale.yaml"),
+            os.path.join(self.BASEDIR, "data", "colors.yaml"),
+        ]
+        if not shared:
+            inputs.append(os.path.join(self.BASEDIR, "data", curr_locale))
+        inputs.append(
+            os.path.join(
+                self.LOCALE_PATH, translated, "LC_MESSAGES", "messages.po"
+            )
+        )
+        if not shared:
+            inputs.append(os.path.join(self.BASEDIR, "static", build_type))
+            inputs.append(os.path.join(self.BASEDIR, "docs", "assets"))
+        return inputs
+
+    def unit_context(self, build_type: str, curr_locale: str) -> dict:
+        """Return values, other than input files, a build unit depends on.
+
+        Args:
+            build_type: string defining the current build done (html, pdf, tex)
+            curr_locale: current locale used for the build (like en_US), or
+                         `SHARED_UNIT`
+
+        Returns:
+            Dictionary of values recorded in the build manifest
+        """
+        context = {"date": self.now_date().date().isoformat()}
+        if curr_locale == self.SHARED_UNIT:
+            # The redirection targets the default locale
+            context["locale"] = self.default_locale
+        if build_type == "html":
+            # Post-render stages modify pages in place
+            context["optimize_html"] = self.optimize_html
+            context["fingerprint_assets"] = self.fingerprint_assets
+        if build_type == "pdf" and self.source_date_epoch is not None:
+            # PDF embed the pinned clock in their metadata
+            context["source_date_epoch"] = self.source_date_epoch
+        return context
+
+    def watched_dirs(self) -> list:
+        """Return directories whose changes trigger a rebuild in watch mode.
+
+        Returns:
+            List of directories path
+        """
+        return [
+            os.path.join(self.BASEDIR, "data"),
+            os.path.join(self.BASEDIR, "template"),
+            os.path.join(self.BASEDIR, "static"),
+            self.LOCALE_PATH,
+            os.path.join(self.BASEDIR, "docs", "assets"),
+        ]
 
     def build_type(self, curr_locale: str, build_type: str) -> None:
         """Process building of output files from the current define build_type.
 
+        When building incrementally, the build is skipped if none of the
+        inputs recorded in the build manifest changed. The `SHARED_UNIT`
+        locale builds the outputs listed in `SHARED_OUTPUTS` instead, with the
+        data of the default locale.
+
         Args:
             build_type: string defining the current build done (html, pdf, tex)
-            curr_locale: current locale used for the build (like en_US)
+            curr_locale: current locale used for the build (like en_US), or
+                         `SHARED_UNIT`
         """
+        shared = curr_locale == self.SHARED_UNIT
+        data_locale = self.default_locale if shared else curr_locale
+        inputs = self.unit_inputs(build_type, curr_locale)
+        context = self.unit_context(build_type, curr_locale)
+        if self.incremental and self.manifest.is_up_to_date(
+            build_type, curr_locale, inputs, context
+        ):
+            # pylint: disable=W1203
+            self.logger.info(
+                f"Skipping {build_type} shared outputs, up to date."
+                if shared
+                else f"Skipping {build_type} for locale {curr_locale}, "
+                + "up to date."
+            )
+            return
+        # pylint: disable=W1203
+        self.logger.info(
+            f"Building {build_type.upper()} shared outputs."
+            if shared
+            else f"Building {build_type.upper()} resume for locale "
+            + f"{curr_locale}."
+        )
+        self.manifest.forget(build_type, curr_locale)
+
         files = {}
-        if build_type in ["pdf", "tex"]:
-            files = {
-                "resume.tex.j2": "resume.tex",
-            }
+        if shared:
+            files = self.SHARED_OUTPUTS[build_type]
+        elif build_type in ["pdf", "tex"]:
+            files = self.tex_targets(curr_locale)
         elif build_type == "html":
             files = {
                 "index.html.j2": "index.html",
                 "404.html.j2": "404.html",
-                "style.css.j2": "../css/style.css",
                 "egg.html.j2": "egg.html",
             }
-        self.init_output_dir(build_type)
-        j2_env = self.init_jinja_env(build_type, curr_locale)
+        output_dir = os.path.join(self.output_dir, build_type)
+        if not shared:
+            output_dir = os.path.join(output_dir, curr_locale)
+
+        tags = {"build_type": build_type, "locale": curr_locale}
+        spec = self.unit_artifacts(build_type, curr_locale, inputs, context)
+        outputs = None
+        if spec:
+            with self.profiler.span("artifacts", **tags):
+                key = self.artifacts.key(spec)
+                outputs = self.artifacts.fetch(key, self.output_dir)
+        if outputs is not None:
+            # pylint: disable=W1203
+            self.logger.info(
+                f"Restored {build_type} shared outputs from artifacts."
+                if shared
+                else f"Restored {build_type} for locale {curr_locale} from "
+                + "artifacts."
+            )
+            # Templates rendered are unknown, the whole family is recorded
+            inputs = spec["files"]
+        else:
+            outputs, templates = self.render_unit(
+                build_type, data_locale, files, output_dir, tags
+            )
+            if spec:
+                self.artifacts.publish(key, self.output_dir, outputs)
+            inputs = inputs + templates
+
+        # Compile every rendered tex target once, after all of them are
+        # rendered
+        if build_type == "pdf":
+            outputs.extend(self.compile_pdf(files, curr_locale))
+
+        self.manifest.record(
+            build_type,
+            curr_locale,
+            inputs,
+            context,
+            [os.path.normpath(i_output) for i_output in outputs],
+        )
 
-        output_dir = os.path.join(self.output_dir, build_type, curr_locale)
-        if not os.path.isdir(output_dir):
-            os.makedirs(output_dir)
+    # pylint: disable=R0913
+    def render_unit(
+        self,
+        build_type: str,
+        data_locale: str,
+        files: dict,
+        output_dir: str,
+        tags: dict,
+    ) -> tuple:
+        """Render the templates of a build unit.
+
+        Args:
+            build_type: string defining the current build done (html, pdf, tex)
+            data_locale: locale whose data and translations are rendered
+            files: dictionary mapping template to render to the output file
+            output_dir: directory where outputs are written
+            tags: tags of the timing spans of the unit
 
+        Returns:
+            Tuple storing the list of the rendered files and of the templates
+            they depend on
+        """
+        with self.profiler.span("jinja_env", **tags):
+            j2_env = self.init_jinja_env(build_type, data_locale)
+        outputs = []
         # pylint: disable=C0206
         for i_template in files:
-            i_output = files[i_template]
-            template = j2_env.get_template(i_template)
-            render = template.render(self.config[curr_locale])
-            with open(
-                os.path.join(output_dir, i_output), "w", encoding="UTF-8"
-            ) as output_file:
-                output_file.write(render)
-
-            if build_type == "pdf":
-                self.compile_pdf(files, curr_locale)
-
-        if build_type == "html" and not self.redirect_build:
-            i_output = "../index.html"
-            template = j2_env.get_template("redirect.html.j2")
-            render = template.render(self.config[curr_locale])
-            with open(
-                os.path.join(output_dir, i_output), "w", encoding="UTF-8"
-            ) as output_file:
-                output_file.write(render)
-            self.redirect_build = True
+            i_output = os.path.join(output_dir, files[i_template])
+            os.makedirs(os.path.dirname(i_output), exist_ok=True)
+            with self.profiler.span("render", template=i_template, **tags):
+                template = j2_env.get_template(i_template)
+                write_stream(
+                    i_output, template.generate(self.config[data_locale])
+                )
+            outputs.append(i_output)
+        # As the environment is shared by locales, templates loaded for a
+        # previous locale are not loaded again, so every template loaded by
+        # the environment is returned
+        return outputs, sorted(j2_env.loader.loaded)
+
+    def unit_artifacts(
+        self, build_type: str, curr_locale: str, inputs: list, context: dict
+    ) -> dict:
+        """Return the inputs of the rendered files of a build unit.
+
+        Args:
+            build_type: string defining the current build done (html, pdf, tex)
+            curr_locale: current locale used for the build (like en_US), or
+                         `SHARED_UNIT`
+            inputs: files and directories the unit depends on, as returned by
+                    `unit_inputs()`
+            context: values the unit depends on, as recorded in the manifest
+
+        Returns:
+            Specification of the inputs given to `ArtifactCache.key()`, None if
+            the artifact cache is disabled
+        """
+        if not self.artifacts:
+            return None
+        family = "html" if build_type == "html" else "tex"
+        files = [
+            *inputs,
+            os.path.join(self.BASEDIR, "template", family),
+            os.path.join(self.BASEDIR, "static", build_type),
+        ]
+        return {
+            # Inputs are identified by their path in the repository
+            "files": {
+                os.path.relpath(i_path, self.BASEDIR): i_path
+                for i_path in files
+            },
+            "tools": self.ARTIFACT_PACKAGES,
+            "values": [build_type, curr_locale, context],
+        }
 
     def build(
         self,
@@ -475,51 +1053,333 @@ class ResumeBuilder:
             pdf: tell if pdf resume should be build, imply `text=True`
             tex: tell if tex resume should be build
         """
+        # Statistics logged once done only count this build, not the previous
+        # ones of the `--watch` session
+        for i_counted in [
+            self.asset_store,
+            self.data_loader,
+            self.fragments,
+            self.artifacts,
+        ]:
+            if i_counted:
+                i_counted.stats = dict.fromkeys(i_counted.stats, 0)
         self.logger.info("Compiling Translations.")
-        subprocess.run(
-            ["pybabel", "compile", "-d", self.LOCALE_PATH, "-f"],
-            capture_output=True,
-            check=True,
+        with self.profiler.span("catalogs"):
+            compiled = self.catalogs.compile()
+        for i_locale in compiled:
+            # pylint: disable=W1203
+            self.logger.debug(f"Compiled translations of locale {i_locale}.")
+        with self.profiler.span("config"):
+            self.data_loader.load_index()
+            self.parse_config()
+        if pdf and self.warm_tex:
+            self.warm_tex_cache()
+
+        self.output_changes.load()
+        if self.incremental:
+            self.manifest.load()
+        elif os.path.isdir(self.output_dir):
+            shutil.rmtree(self.output_dir)
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.asset_store.load()
+        if self.artifacts:
+            self.artifacts.load()
+
+        try:
+            self.build_locales(html, pdf, tex)
+        finally:
+            self.manifest.save()
+            self.asset_store.save()
+            if self.artifacts:
+                self.artifacts.save()
+            self.data_loader.save_index()
+            changed, deleted = self.output_changes.save()
+        # pylint: disable=W1203
+        self.logger.info(
+            f"Output: {len(changed)} changed, {len(deleted)} deleted files, "
+            + f"listed in {self.output_changes.path}."
+        )
+        stats = ", ".join(
+            f"{count} {action}"
+            for action, count in self.asset_store.stats.items()
         )
-        self.parse_config()
+        # pylint: disable=W1203
+        self.logger.info(f"Static assets: {stats}.")
+        stats = ", ".join(
+            f"{count} {action}"
+            for action, count in self.data_loader.stats.items()
+        )
+        # pylint: disable=W1203
+        self.logger.debug(f"Data files: {stats}.")
+        if self.fragments:
+            stats = ", ".join(
+                f"{count} {action}"
+                for action, count in self.fragments.stats.items()
+            )
+            # pylint: disable=W1203
+            self.logger.debug(f"Fragments: {stats}.")
+        if self.artifacts:
+            stats = ", ".join(
+                f"{count} {action}"
+                for action, count in self.artifacts.stats.items()
+            )
+            # pylint: disable=W1203
+            self.logger.info(f"Artifacts: {stats}.")
 
-        if os.path.isdir(self.output_dir):
-            shutil.rmtree(self.output_dir)
-        os.makedirs(self.output_dir)
+    def build_locales(self, html: bool, pdf: bool, tex: bool) -> None:
+        """Load data of every locale and build each requested type.
 
+        Args:
+            html: tell if html resume should be build
+            pdf: tell if pdf resume should be build
+            tex: tell if tex resume should be build
+        """
+        build_types = {"tex": tex, "pdf": pdf, "html": html}
+        units = []
+        self.default_locale = None
         for i_locale in self.config["locale"]:
             locale_code = i_locale["code"]
             if os.path.isdir(os.path.join(self.BASEDIR, "data", locale_code)):
-                for i_file in os.listdir(
-                    os.path.join(self.BASEDIR, "data", locale_code)
+                with self.profiler.span("data", locale=locale_code):
+                    self.load_locale_data(locale_code)
+                units.extend(
+                    (locale_code, build_type)
+                    for build_type, enabled in build_types.items()
+                    if enabled
+                )
+                if not self.default_locale:
+                    self.default_locale = locale_code
+        if self.default_locale:
+            units[:0] = [
+                (self.SHARED_UNIT, build_type)
+                for build_type, enabled in build_types.items()
+                if enabled and build_type in self.SHARED_OUTPUTS
+            ]
+
+        # Static files are synchronised by every build of the process
+        for build_type in sorted({i_unit[1] for i_unit in units}):
+            with self.profiler.span("output_init", build_type=build_type):
+                self.init_output_dir(build_type)
+        if self.jobs > 1 and len(units) > 1:
+            self.build_units_parallel(units)
+        else:
+            for locale_code, build_type in units:
+                with self.profiler.span(
+                    "unit", build_type=build_type, locale=locale_code
                 ):
-                    curr_file = os.path.join(
-                        self.BASEDIR, "data", locale_code, i_file
-                    )
-                    with open(curr_file, "r", encoding="UTF-8") as config_file:
-                        self.config[locale_code].update(
-                            yaml.load(config_file, Loader=yaml.SafeLoader)
+                    self.build_type(locale_code, build_type)
+        if html:
+            self.post_process_html()
+        self.run_pdf_jobs()
+
+    def load_locale_data(self, locale_code: str) -> None:
+        """Load data files of a locale and precompute their dates.
+
+        Args:
+            locale_code: locale whose data are loaded (like en_US)
+        """
+        for i_file in os.listdir(
+            os.path.join(self.BASEDIR, "data", locale_code)
+        ):
+            curr_file = os.path.join(self.BASEDIR, "data", locale_code, i_file)
+            self.config[locale_code].update(self.data_loader.load(curr_file))
+        add_dates(self.config[locale_code], self.now.date())
+
+    def post_process_html(self) -> None:
+        """Run the optional stages applied once every html page is rendered."""
+        if self.subset_fonts:
+            with self.profiler.span("subset_fonts", build_type="html"):
+                self.subset_webfonts()
+        if self.optimize_html:
+            with self.profiler.span("optimize_html", build_type="html"):
+                built = self.manifest.built_outputs("html")
+                rendered = [
+                    i_path for i_path in built if i_path.endswith(".html")
+                ]
+                # Every page inlines rules of the rendered stylesheets
+                if any(i_output.endswith(".css") for i_output in built):
+                    rendered = None
+                optimized = HtmlOptimizer(
+                    os.path.join(self.output_dir, "html"), self.logger
+                ).run(rendered)
+                self.manifest.update_outputs(
+                    {i_page: i_page for i_page in optimized}
+                )
+        if self.fingerprint_assets:
+            with self.profiler.span("fingerprint_assets", build_type="html"):
+                self.publish_assets()
+
+    def subset_webfonts(self) -> None:
+        """Subset webfonts of the html output to the glyphs used by pages.
+
+        Done once every html page is rendered, as pages of every locale share
+        the same fonts.
+        """
+        FontSubsetter(
+            os.path.join(self.BASEDIR, "static", "html"),
+            os.path.join(self.output_dir, "html"),
+            os.path.join(self.cache_dir, "fonts"),
+            self.logger,
+        ).run()
+
+    def publish_assets(self) -> None:
+        """Fingerprint html assets in their final state and update pages.
+
+        Assets are fingerprinted once every page is rendered and every
+        post-render stage modified them. Pages rendered by this build, which
+        reference assets by their plain name, are then rewritten. Pages
+        skipped by an incremental build are only rewritten when an asset was
+        published under a new name. Outputs rewritten or renamed are hashed
+        again by the manifest.
+        """
+        html_dir = os.path.join(self.output_dir, "html")
+        mapping_file = os.path.join(html_dir, "assets.json")
+        try:
+            with open(mapping_file, "r", encoding="UTF-8") as previous_file:
+                previous = json.load(previous_file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            previous = {}
+        mapping = self.asset_store.fingerprint(html_dir, self.ASSET_EXTENSIONS)
+        pages = [
+            i_output
+            for i_output in self.manifest.built_outputs("html")
+            if i_output.endswith(".html")
+        ]
+        if mapping != previous:
+            pages = output_files(html_dir, (".html",))
+        changed = {
+            os.path.join(html_dir, path): os.path.join(html_dir, fingerprinted)
+            for path, fingerprinted in mapping.items()
+        }
+        for i_page in pages:
+            if self.asset_store.rewrite_references(i_page, html_dir, mapping):
+                changed[i_page] = i_page
+        self.manifest.update_outputs(changed)
+        write_file(
+            mapping_file, json.dumps(mapping, indent=2, sort_keys=True) + "\n"
+        )
+
+    # pylint: disable=R0914
+    def build_units_parallel(self, units: list) -> None:
+        """Build units, i.e. (locale, build type) couples, in a process pool.
+
+        Each worker process receive a copy of the builder, so `locale` and
+        working directory changes done while building stay local to the
+        worker. Logs of workers are forwarded to the main process and the
+        manifest records of each unit are merged back once done.
+
+        Args:
+            units: list of tuples `(locale, build_type)` to build
+        """
+        # pylint: disable=C0415
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        from logging.handlers import QueueListener
+
+        log_queue = multiprocessing.Queue()
+        # Records are handled by the builder logger of the main process, which
+        # dispatch them to its own handlers or the ones of its parents.
+        listener = QueueListener(log_queue, self.logger)
+        listener.start()
+        failures = []
+        try:
+            with ProcessPoolExecutor(
+                max_workers=min(self.jobs, len(units)),
+                initializer=init_build_worker,
+                initargs=(self, log_queue),
+            ) as executor:
+                futures = {
+                    executor.submit(build_unit, *i_unit): i_unit
+                    for i_unit in units
+                }
+                for future in as_completed(futures):
+                    curr_locale, build_type = futures[future]
+                    try:
+                        record, files, jobs, spans, stats = future.result()
+                    # pylint: disable=W0703
+                    except Exception as error:
+                        # pylint: disable=W1203
+                        self.logger.error(
+                            f"Failed to build {build_type} for locale "
+                            + f"{curr_locale}: {error!r}"
                         )
-                if pdf or tex:
-                    # pylint: disable=W1203
-                    self.logger.info(
-                        f"Building PDF resume for locale {locale_code}.",
-                    )
-                    if tex:
-                        self.build_type(locale_code, "tex")
-                    if pdf:
-                        self.build_type(locale_code, "pdf")
-                if html:
-                    # pylint: disable=W1203
-                    self.logger.info(
-                        f"Building HTML resume for locale {locale_code}.",
-                    )
-                    self.build_type(locale_code, "html")
+                        failures.append(f"{build_type}/{curr_locale}")
+                        continue
+                    self.manifest.merge(build_type, curr_locale, record, files)
+                    self.scheduler.jobs.extend(jobs)
+                    self.profiler.merge(spans)
+                    if self.artifacts:
+                        self.artifacts.merge_stats(stats)
+        finally:
+            listener.stop()
+        if failures:
+            failed = ", ".join(sorted(failures))
+            raise RuntimeError(f"Failed to build {failed}")
+
+
+# Builder used by the current process when building units in parallel
+WORKER_BUILDER = None
+
+
+def init_build_worker(
+    builder: ResumeBuilder, log_queue: multiprocessing.Queue
+) -> None:
+    """Initialize a worker process of the parallel build.
 
+    Args:
+        builder: builder, with its configuration loaded, to use in the worker
+        log_queue: queue used to forward log records to the main process
+    """
+    # pylint: disable=W0603
+    global WORKER_BUILDER
+    WORKER_BUILDER = builder
+    # pylint: disable=C0415
+    from logging.handlers import QueueHandler
+
+    for i_handler in list(builder.logger.handlers):
+        builder.logger.removeHandler(i_handler)
+    builder.logger.addHandler(QueueHandler(log_queue))
+    builder.logger.setLevel(logging.DEBUG)
+    builder.logger.propagate = False
+
+
+def build_unit(curr_locale: str, build_type: str) -> tuple:
+    """Build a single unit in a worker process.
+
+    Args:
+        curr_locale: locale to build (like en_US)
+        build_type: string defining the build (html, pdf, tex)
+
+    Returns:
+        Tuple storing the manifest record of the unit, known files hashes,
+        the lualatex and ghostscript jobs to be run by the main process, the
+        timing spans recorded while building the unit and the statistics of
+        the artifact cache
+    """
+    profiler = WORKER_BUILDER.profiler
+    marker = profiler.mark()
+    with profiler.span("unit", build_type=build_type, locale=curr_locale):
+        WORKER_BUILDER.build_type(curr_locale, build_type)
+    manifest = WORKER_BUILDER.manifest
+    return (
+        manifest.units.get(manifest.unit_key(build_type, curr_locale)),
+        manifest.hasher.cache,
+        WORKER_BUILDER.scheduler.pop_jobs(),
+        profiler.spans_since(marker),
+        (
+            WORKER_BUILDER.artifacts.pop_stats()
+            if WORKER_BUILDER.artifacts
+            else None
+        ),
+    )
 
-def parse_arg() -> argparse:
+
+def parse_arg(argv: list = None) -> argparse:
     """Parse arguments passed when calling the script from terminal.
 
+    Args:
+        argv: arguments to parse instead of the ones of the command line
+
     Return:
         argparse object which store arguments
     """
@@ -573,6 +1433,30 @@ def parse_arg() -> argparse:
                 pdf so there is nothing to be served
                 """,
     )
+    parser.add_argument(
+        "--watch",
+        "-w",
+        default=False,
+        dest="watch",
+        action="store_true",
+        required=False,
+        help="""
+                Once building of resume is done, rebuild outputs depending on
+                files changed in `data`, `template`, `static` and `locale` and,
+                when html is built, serve it and reload pages once rebuilt.
+                """,
+    )
+    parser.add_argument(
+        "--port",
+        "-p",
+        type=int,
+        default=8080,
+        dest="port",
+        required=False,
+        metavar="port",
+        help="""Port on which html pages are served by `--serve` and
+            `--watch`.""",
+    )
     parser.add_argument(
         "--verbosity",
         "-v",
@@ -592,7 +1476,155 @@ def parse_arg() -> argparse:
         default=False,
         help="""Do now show LaTeX and Ghostscript output""",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--incremental",
+        "-i",
+        dest="incremental",
+        required=False,
+        action="store_true",
+        default=False,
+        help="""Do not clean the output directory and only rebuild outputs
+            whose inputs changed since the last build.""",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        dest="jobs",
+        required=False,
+        metavar="N",
+        help="""Number of processes used to build locales and build types in
+            parallel, `0` to use all the CPUs.""",
+    )
+    parser.add_argument(
+        "--tex-jobs",
+        type=int,
+        default=os.cpu_count(),
+        dest="tex_jobs",
+        required=False,
+        metavar="N",
+        help="""Maximum number of lualatex and Ghostscript processes run
+            concurrently.""",
+    )
+    parser.add_argument(
+        "--tex-timeout",
+        type=float,
+        default=600,
+        dest="tex_timeout",
+        required=False,
+        metavar="SECONDS",
+        help="""Maximum duration of a single lualatex or Ghostscript run.""",
+    )
+    parser.add_argument(
+        "--build-date",
+        type=datetime.datetime.fromisoformat,
+        default=None,
+        dest="build_date",
+        required=False,
+        metavar="DATE",
+        help="""Date and time, in ISO 8601 format and UTC if no offset is
+            given, the build is pinned to instead of the current time, like
+            SOURCE_DATE_EPOCH which is used when not set.""",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=".cache",
+        dest="cache_dir",
+        required=False,
+        metavar="cache_dir",
+        help="""Location of the directory where data reused between builds,
+            like LaTeX auxiliary files, are stored.""",
+    )
+    parser.add_argument(
+        "--artifact-cache",
+        type=str,
+        default=None,
+        dest="artifact_cache",
+        required=False,
+        metavar="location",
+        help="""Location of a cache of rendered files and compiled PDF shared
+            between builds and machines, like CI runners, either a directory
+            or an HTTP URL accepting GET and PUT requests.""",
+    )
+    parser.add_argument(
+        "--warm-tex-cache",
+        dest="warm_tex_cache",
+        required=False,
+        action="store_true",
+        default=False,
+        help="""Before building PDF, build the luaotfload font names database
+            in the cache directory.""",
+    )
+    parser.add_argument(
+        "--tex-format",
+        dest="tex_format",
+        required=False,
+        action="store_true",
+        default=False,
+        help="""Dump the preamble of each LaTeX document into a format reused
+            by later compilations (requires `mylatexformat`).""",
+    )
+    parser.add_argument(
+        "--subset-fonts",
+        dest="subset_fonts",
+        required=False,
+        action="store_true",
+        default=False,
+        help="""Subset webfonts of the html output to the characters and icons
+            used by the pages, as woff2 only (requires `fonttools[woff]`).""",
+    )
+    parser.add_argument(
+        "--optimize-html",
+        dest="optimize_html",
+        required=False,
+        action="store_true",
+        default=False,
+        help="""Purge unused selectors of the CSS libraries, inline the
+            critical CSS of each page and minify html and CSS.""",
+    )
+    parser.add_argument(
+        "--fingerprint-assets",
+        dest="fingerprint_assets",
+        required=False,
+        action="store_true",
+        default=False,
+        help="""Publish stylesheets and scripts of the html output under names
+            including their content hash, listed in `assets.json`, so they can
+            be cached forever.""",
+    )
+    parser.add_argument(
+        "--profile",
+        dest="profile",
+        required=False,
+        action="store_true",
+        default=False,
+        help="""Print the time spent in each stage of the build, like the
+            rendering of templates or lualatex runs, once the build is
+            done.""",
+    )
+    parser.add_argument(
+        "--trace",
+        type=str,
+        default=None,
+        dest="trace",
+        required=False,
+        metavar="trace_file",
+        help="""Write the timing spans of the build stages, tagged with their
+            locale and build type, as a Chrome trace event JSON file.""",
+    )
+    parser.add_argument(
+        "--cprofile",
+        type=str,
+        default=None,
+        dest="cprofile",
+        required=False,
+        metavar="prof_file",
+        help="""Profile the Python code of the main process with cProfile
+            and write the statistics in a `.prof` file.""",
+    )
+    return parser.parse_args(argv)
 
 
 def set_log_verbosity(level: int) -> str:
@@ -615,37 +1647,112 @@ def set_log_verbosity(level: int) -> str:
     return "ERROR"
 
 
+def profile_build(
+    builder: ResumeBuilder, args: argparse, build_types: dict
+) -> None:
+    """Build the resume and report the profiling requested by arguments.
+
+    Args:
+        builder: builder of the resume
+        args: argparse object storing arguments
+        build_types: dictionary telling which build types to build
+    """
+    profile = None
+    if args.cprofile:
+        # pylint: disable=C0415
+        import cProfile
+
+        profile = cProfile.Profile()
+    if profile:
+        profile.enable()
+    builder.build(**build_types)
+    if profile:
+        profile.disable()
+        profile.dump_stats(args.cprofile)
+    if args.profile:
+        print(builder.profiler.summary())
+    if args.trace:
+        builder.profiler.write_trace(args.trace)
+
+
+def serve_output(
+    builder: ResumeBuilder, args: argparse, build_types: dict
+) -> None:
+    """Serve the html output and, in watch mode, rebuild it on changes.
+
+    Args:
+        builder: builder of the resume, which already built it once
+        args: argparse object storing arguments
+        build_types: dictionary telling which build types to build
+    """
+    # pylint: disable=C0415
+    import asyncio
+
+    from resume_builder.watch import (
+        FileWatcher,
+        LiveReloadServer,
+        serve,
+        watch,
+    )
+
+    html_dir = os.path.join(builder.output_dir, "html")
+    try:
+        if args.watch:
+            # Later builds only rebuild units depending on changed files
+            builder.incremental = True
+            server = None
+            if build_types["html"]:
+                server = LiveReloadServer(html_dir, builder.logger, args.port)
+            asyncio.run(
+                watch(
+                    FileWatcher(builder.watched_dirs()),
+                    lambda changed: builder.build(**build_types),
+                    builder.logger,
+                    server,
+                )
+            )
+        else:
+            asyncio.run(
+                serve(
+                    LiveReloadServer(
+                        html_dir, builder.logger, args.port, live_reload=False
+                    )
+                )
+            )
+    except KeyboardInterrupt:
+        pass
+
+
 def main():
     """Method processing the build of the resume when called from terminal."""
     args = parse_arg()
     if isinstance(args.build, list):
         args.build = args.build[0]
+    if isinstance(args.output_dir, list):
+        args.output_dir = args.output_dir[0]
 
     log_format = "%(asctime)s [%(levelname)s] %(name)s - %(message)s"
     logging.basicConfig(format=log_format)
     logger = logging.getLogger("resume_builder.py")
+    # pylint: disable=C0415
+    import coloredlogs
+
     coloredlogs.install(level=set_log_verbosity(args.verbosity), logger=logger)
 
     builder = ResumeBuilder(args)
 
     if args.build == "pdf":
-        builder.build(pdf=True, html=False, tex=False)
+        build_types = {"pdf": True, "html": False, "tex": False}
     elif args.build == "html":
-        builder.build(pdf=False, html=True, tex=False)
+        build_types = {"pdf": False, "html": True, "tex": False}
     elif args.build == "tex":
-        builder.build(pdf=False, html=False, tex=True)
+        build_types = {"pdf": False, "html": False, "tex": True}
     else:
-        builder.build()
+        build_types = {"pdf": True, "html": True, "tex": True}
+    profile_build(builder, args, build_types)
 
-    if args.serve and args.build in ["html", "both"]:
-        os.chdir(
-            os.path.join(
-                os.path.dirname(os.path.realpath(__file__)),
-                builder.output_dir,
-                "html",
-            )
-        )
-        subprocess.run(["python", "-m", "http.server", "8080"], check=True)
+    if args.watch or (args.serve and build_types["html"]):
+        serve_output(builder, args, build_types)
 
 
 if __name__ == "__main__":
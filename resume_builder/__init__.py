@@ -0,0 +1,6 @@
+"""Helpers used by `main.py` to build the resume.
+
+This package gathers the pieces of the build pipeline which are not directly
+related to the rendering of the templates, such as the tracking of the build
+inputs used to only rebuild what changed since the last build.
+"""
@@ -0,0 +1,464 @@
+"""Content-addressed cache of build artifacts shared between machines.
+
+Artifacts, like the html and tex files rendered for a locale or the colour
+and black & white PDF compiled from a tex file, are stored under a key
+hashing every input producing them: content of the input files, versions of
+the tools and Python packages used and any other value the build depends on.
+Input files are identified by a name, like their path in the repository, and
+files of an input directory by their path relative to it, so keys do not
+depend on where the repository, the output or the cache are. A builder, or a
+CI runner, finding the key in the cache restores the artifacts instead of
+rendering templates or running lualatex and gs.
+
+Each key is stored as a JSON entry listing the artifacts, with their path
+relative to the directory they are restored in, and the hash of their
+content, which is stored once as a blob:
+
+    entries/<key[:2]>/<key[2:]>.json
+    blobs/<sha256[:2]>/<sha256[2:]>
+
+The storage is a backend only able to get and put such paths, either a local
+directory, or an HTTP server answering `GET` and accepting `PUT` requests,
+like a WebDAV share. A backend which can not be reached only turns lookups
+into misses, it never fails the build. Entries are not trusted: artifacts
+whose path leaves the directory they are restored in, or whose content does
+not match its hash, turn the lookup into a miss as well.
+"""
+
+# Python Core Library
+# -----------------------------------------------------------------------------
+# https://docs.python.org/3/library/hashlib.html
+# Secure hashes and message digests
+import hashlib
+
+# https://docs.python.org/3/library/http.client.html
+# HTTP protocol client
+import http.client
+
+# https://docs.python.org/3/library/importlib.metadata.html
+# Accessing package metadata
+import importlib.metadata
+
+# https://docs.python.org/3/library/json.html
+# JSON encoder and decoder
+import json
+
+# https://docs.python.org/3/library/logging.html
+# Logging facility for Python
+import logging
+
+# https://docs.python.org/3/library/os.html
+# Miscellaneous operating system interfaces
+import os
+
+# https://docs.python.org/3/library/re.html
+# Regular expression operations
+import re
+
+# https://docs.python.org/3/library/subprocess.html
+# Subprocess management
+import subprocess
+
+# https://docs.python.org/3/library/urllib.request.html
+# Extensible library for opening URLs
+import urllib.error
+import urllib.request
+
+# Local Library
+# -----------------------------------------------------------------------------
+# Compute content hashes of files
+from resume_builder.manifest import FileHasher
+
+SHA256_REGEXP = re.compile(r"[0-9a-f]{64}")
+
+
+class LocalBackend:
+    """Store artifacts in a local directory, like a mounted shared volume."""
+
+    def __init__(self, directory: str) -> None:
+        """Initialize LocalBackend objects.
+
+        Args:
+            directory: directory where entries and blobs are stored
+        """
+        self.directory = directory
+
+    def __str__(self) -> str:
+        """Return the location of the backend."""
+        return self.directory
+
+    def get(self, path: str) -> bytes:
+        """Return the content stored at a path.
+
+        Args:
+            path: path relative to the root of the cache
+
+        Returns:
+            Stored content, None if nothing is stored at this path
+        """
+        try:
+            with open(os.path.join(self.directory, path), "rb") as blob_file:
+                return blob_file.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, path: str, content: bytes) -> None:
+        """Store content at a path, atomically.
+
+        Args:
+            path: path relative to the root of the cache
+            content: content to store
+        """
+        dest = os.path.join(self.directory, path)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        with open(f"{dest}.{os.getpid()}", "wb") as blob_file:
+            blob_file.write(content)
+        os.replace(f"{dest}.{os.getpid()}", dest)
+
+
+class HttpBackend:
+    """Store artifacts on an HTTP server with `GET` and `PUT` requests."""
+
+    def __init__(self, url: str, timeout: float = 30) -> None:
+        """Initialize HttpBackend objects.
+
+        Args:
+            url: base URL of the cache, paths being appended to it
+            timeout: maximum duration, in seconds, of a single request
+        """
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def __str__(self) -> str:
+        """Return the location of the backend."""
+        return self.url
+
+    def get(self, path: str) -> bytes:
+        """Return the content stored at a path.
+
+        Args:
+            path: path relative to the base URL of the cache
+
+        Returns:
+            Stored content, None if the server answers 404
+
+        Raises:
+            OSError: if the server can not be reached or fails
+            http.client.HTTPException: if the response is malformed
+        """
+        try:
+            with urllib.request.urlopen(
+                f"{self.url}/{path}", timeout=self.timeout
+            ) as response:
+                return response.read()
+        except urllib.error.HTTPError as error:
+            if error.code == 404:
+                return None
+            raise
+
+    def put(self, path: str, content: bytes) -> None:
+        """Store content at a path.
+
+        Args:
+            path: path relative to the base URL of the cache
+            content: content to store
+
+        Raises:
+            OSError: if the server can not be reached or refuses the content
+            http.client.HTTPException: if the response is malformed
+        """
+        request = urllib.request.Request(
+            f"{self.url}/{path}",
+            data=content,
+            method="PUT",
+            headers={"Content-Type": "application/octet-stream"},
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+def open_backend(location: str):
+    """Return the backend of a cache location.
+
+    Args:
+        location: URL starting with `http://` or `https://`, or path of a
+                  local directory
+
+    Returns:
+        `HttpBackend` or `LocalBackend` object
+    """
+    if location.startswith(("http://", "https://")):
+        return HttpBackend(location)
+    return LocalBackend(os.path.abspath(location))
+
+
+class ArtifactCache:
+    """Restore and publish artifacts keyed by the hash of their inputs."""
+
+    def __init__(self, backend, logger: logging.Logger, index: str) -> None:
+        """Initialize ArtifactCache objects.
+
+        Args:
+            backend: `LocalBackend` or `HttpBackend` storing the artifacts
+            logger: logger used to report unreachable backends
+            index: file where hashes of input files are kept between builds
+        """
+        self.backend = backend
+        self.logger = logger
+        self.index = index
+        self.hasher = FileHasher()
+        self.trees = {}
+        self.versions = {}
+        self.stats = {"restored": 0, "missed": 0, "published": 0}
+
+    def load(self) -> None:
+        """Load hashes of input files known from previous builds.
+
+        Called at the start of every build, as hashes of input directories
+        are only computed once per build.
+        """
+        self.trees = {}
+        try:
+            with open(self.index, "r", encoding="UTF-8") as index_file:
+                self.hasher = FileHasher(json.load(index_file))
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.hasher = FileHasher()
+
+    def save(self) -> None:
+        """Save hashes of known input files for the next build."""
+        os.makedirs(os.path.dirname(self.index), exist_ok=True)
+        with open(self.index, "w", encoding="UTF-8") as index_file:
+            json.dump(self.hasher.cache, index_file, indent=2, sort_keys=True)
+
+    def version(self, name: str) -> str:
+        """Return the version of a tool or a Python package, computed once.
+
+        Args:
+            name: name of a Python distribution, like `Jinja2`, or of a
+                  command accepting `--version`, like `lualatex`
+
+        Returns:
+            Version of the package, first line output by the command, or an
+            empty string if neither is found
+        """
+        if name not in self.versions:
+            try:
+                self.versions[name] = importlib.metadata.version(name)
+            except importlib.metadata.PackageNotFoundError:
+                try:
+                    output = subprocess.run(
+                        [name, "--version"],
+                        capture_output=True,
+                        check=False,
+                        text=True,
+                    ).stdout
+                except OSError:
+                    output = ""
+                self.versions[name] = (output.splitlines() or [""])[0]
+        return self.versions[name]
+
+    def tree(self, path: str) -> str:
+        """Return the hash of an input file or directory.
+
+        Files are only read when their mtime or size changed since they were
+        last hashed, and directories, like the fonts, are hashed once per
+        build.
+
+        Args:
+            path: path of the input file or directory
+
+        Returns:
+            Hash of the path, relative to the input, and of the content of
+            every file of the input
+        """
+        if path in self.trees:
+            return self.trees[path]
+        digest = hashlib.sha256()
+        for i_file in self.hasher.walk(path):
+            name = os.path.relpath(i_file, path)
+            digest.update(
+                f"{name}\0{self.hasher.file(i_file)}\0".encode("UTF-8")
+            )
+        if os.path.isdir(path):
+            self.trees[path] = digest.hexdigest()
+        return digest.hexdigest()
+
+    def key(self, spec: dict) -> str:
+        """Return the key of artifacts.
+
+        Args:
+            spec: dictionary describing the inputs of the artifacts:
+
+                  * `files`: dictionary mapping a name identifying each input
+                    file or directory, like its path in the repository, to
+                    its path
+                  * `tools`: tools and Python packages used
+                  * `values`: any other value the artifacts depend on
+
+        Returns:
+            Hash of every input
+        """
+        digest = hashlib.sha256()
+        for name, i_path in sorted(spec.get("files", {}).items()):
+            digest.update(
+                f"file\0{name}\0{self.tree(i_path)}\0".encode("UTF-8")
+            )
+        for i_tool in spec.get("tools", []):
+            digest.update(
+                f"tool\0{i_tool}\0{self.version(i_tool)}\0".encode("UTF-8")
+            )
+        digest.update(
+            json.dumps(spec.get("values", []), sort_keys=True).encode("UTF-8")
+        )
+        return digest.hexdigest()
+
+    def pop_stats(self) -> dict:
+        """Return and reset the statistics of the cache.
+
+        Used to send statistics of a worker process to the main one.
+
+        Returns:
+            Dictionary mapping actions to their count
+        """
+        stats = self.stats
+        self.stats = dict.fromkeys(stats, 0)
+        return stats
+
+    def merge_stats(self, stats: dict) -> None:
+        """Add statistics of another process.
+
+        Args:
+            stats: statistics as returned by `pop_stats()`
+        """
+        for action, count in stats.items():
+            self.stats[action] += count
+
+    @staticmethod
+    def entry_path(key: str) -> str:
+        """Return the path of the entry of a key in the backend."""
+        return f"entries/{key[:2]}/{key[2:]}.json"
+
+    @staticmethod
+    def blob_path(digest: str) -> str:
+        """Return the path of a blob in the backend."""
+        return f"blobs/{digest[:2]}/{digest[2:]}"
+
+    @staticmethod
+    def restore_path(base_dir: str, path: str, digest: str) -> str:
+        """Return where an artifact listed by an entry is restored.
+
+        Args:
+            base_dir: directory where artifacts are restored
+            path: path of the artifact, relative to `base_dir`
+            digest: hash of the content of the artifact
+
+        Returns:
+            Path of the artifact in `base_dir`
+
+        Raises:
+            ValueError: if the path is absolute or leaves `base_dir`, or the
+                        hash is not a SHA-256 digest
+        """
+        if not SHA256_REGEXP.fullmatch(digest):
+            raise ValueError(f"Invalid artifact hash {digest!r}")
+        base_dir = os.path.normpath(base_dir)
+        dest = os.path.normpath(os.path.join(base_dir, path))
+        if os.path.isabs(path) or not dest.startswith(base_dir + os.sep):
+            raise ValueError(f"Invalid artifact path {path!r}")
+        return dest
+
+    def fetch(self, key: str, base_dir: str) -> list:
+        """Restore the artifacts of a key.
+
+        Args:
+            key: key of the artifacts, as returned by `key()`
+            base_dir: directory where artifacts are restored
+
+        Returns:
+            List of the restored files, None if the key is not cached, or an
+            artifact is missing, corrupted or restored outside of `base_dir`
+        """
+        try:
+            entry = self.backend.get(self.entry_path(key))
+            if entry is None:
+                self.stats["missed"] += 1
+                return None
+            files = json.loads(entry)["files"]
+            contents = {}
+            for path, digest in files.items():
+                dest = self.restore_path(base_dir, path, digest)
+                content = self.backend.get(self.blob_path(digest))
+                if (
+                    content is None
+                    or hashlib.sha256(content).hexdigest() != digest
+                ):
+                    self.stats["missed"] += 1
+                    return None
+                contents[dest] = content
+        except (
+            OSError,
+            ValueError,
+            KeyError,
+            TypeError,
+            http.client.HTTPException,
+        ) as error:
+            self.logger.warning(
+                "Unable to restore artifacts from %s: %s", self.backend, error
+            )
+            self.stats["missed"] += 1
+            return None
+        restored = []
+        for dest, content in contents.items():
+            write_bytes(dest, content)
+            restored.append(dest)
+        self.stats["restored"] += 1
+        return restored
+
+    def publish(self, key: str, base_dir: str, paths: list) -> None:
+        """Store artifacts under a key.
+
+        Blobs are stored before the entry, so an entry is never visible
+        before the artifacts it lists.
+
+        Args:
+            key: key of the artifacts, as returned by `key()`
+            base_dir: directory artifacts are relative to
+            paths: files to store
+        """
+        files = {}
+        try:
+            for i_path in paths:
+                with open(i_path, "rb") as artifact_file:
+                    content = artifact_file.read()
+                digest = hashlib.sha256(content).hexdigest()
+                self.backend.put(self.blob_path(digest), content)
+                files[os.path.relpath(i_path, base_dir)] = digest
+            self.backend.put(
+                self.entry_path(key),
+                json.dumps({"files": files}, indent=2, sort_keys=True).encode(
+                    "UTF-8"
+                ),
+            )
+        except (OSError, http.client.HTTPException) as error:
+            self.logger.warning(
+                "Unable to publish artifacts to %s: %s", self.backend, error
+            )
+            return
+        self.stats["published"] += 1
+
+
+def write_bytes(path: str, content: bytes) -> None:
+    """Write a restored artifact atomically, unless already up to date.
+
+    Args:
+        path: path of the file to write
+        content: content of the file
+    """
+    if os.path.isfile(path):
+        with open(path, "rb") as current_file:
+            if current_file.read() == content:
+                return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f"{path}.{os.getpid()}", "wb") as artifact_file:
+        artifact_file.write(content)
+    os.replace(f"{path}.{os.getpid()}", path)
@@ -0,0 +1,362 @@
+"""Content-addressed store of static assets and fingerprinting of their names.
+
+Static files and documentation assets are identical from one build to the
+next, so instead of being copied into every output tree, each file is hashed
+once, stored in the cache directory under its content hash and materialised
+in the output as a hardlink to the stored object. When hardlinks are not
+supported, for instance when the cache and the output are on different file
+systems, a reflink is tried before falling back to a plain copy.
+
+Stored objects are read-only and shared by every output tree, so files of the
+output must never be modified in place but replaced, see `write_file()`.
+
+Optionally, stylesheets and scripts of the html output are also published
+under a fingerprinted name, like `style.0123456789.css`, so they can be
+served with long-lived `Cache-Control: immutable` headers. Pages are
+rendered with plain names, which are rewritten once all post-render stages
+modified the assets, and only the fingerprinted files are kept.
+"""
+
+# Python Core Library
+# -----------------------------------------------------------------------------
+# https://docs.python.org/3/library/errno.html
+# Standard errno system symbols
+import errno
+
+# https://docs.python.org/3/library/fcntl.html
+# The fcntl and ioctl system calls
+import fcntl
+
+# https://docs.python.org/3/library/filecmp.html
+# File and Directory Comparisons
+import filecmp
+
+# https://docs.python.org/3/library/json.html
+# JSON encoder and decoder
+import json
+
+# https://docs.python.org/3/library/os.html
+# Miscellaneous operating system interfaces
+import os
+
+# https://docs.python.org/3/library/re.html
+# Regular expression operations
+import re
+import shutil
+
+# https://docs.python.org/3/library/tempfile.html
+# Generate temporary files and directories
+import tempfile
+
+# Local Library
+# -----------------------------------------------------------------------------
+# Compute content hashes of files
+from resume_builder.manifest import FileHasher
+
+# ioctl request cloning a file on copy-on-write file systems (btrfs, xfs)
+FICLONE = 0x40049409
+FINGERPRINT_LENGTH = 10
+FINGERPRINT_REGEXP = re.compile(
+    r"\.[0-9a-f]{" + str(FINGERPRINT_LENGTH) + r"}(?=\.[^./]+$)"
+)
+REFERENCE_REGEXP = re.compile(r"\b(href|src)=\"([^\"#?:]+)\"")
+
+
+def write_file(path: str, content: str) -> bool:
+    """Write a text file of the output atomically.
+
+    The content is written in a temporary file which then replaces the
+    destination, so a file materialised from the asset store is replaced
+    instead of modifying the stored object.
+
+    Args:
+        path: path of the file to write
+        content: content of the file
+
+    Returns:
+        True if the file was written, False if it already had this content
+    """
+    return write_stream(path, [content])
+
+
+def write_stream(path: str, chunks) -> bool:
+    """Write a text file of the output atomically from chunks of text.
+
+    Chunks are written as they are produced, like by the `generate()` method
+    of a template, so the whole content is never held in memory. The
+    destination is only replaced once every chunk is written, so an error
+    while producing the chunks leaves the previous file untouched. A
+    destination which already has the same content is left untouched too,
+    keeping its mtime for deploy tools and caches.
+
+    Args:
+        path: path of the file to write
+        chunks: iterable of strings making the content of the file
+
+    Returns:
+        True if the file was written, False if it already had this content
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        "w", encoding="UTF-8", dir=directory, delete=False
+    ) as tmp_file:
+        try:
+            tmp_file.writelines(chunks)
+        except BaseException:
+            tmp_file.close()
+            os.remove(tmp_file.name)
+            raise
+    if os.path.isfile(path) and filecmp.cmp(tmp_file.name, path, False):
+        os.remove(tmp_file.name)
+        return False
+    os.chmod(tmp_file.name, 0o644)
+    os.replace(tmp_file.name, path)
+    return True
+
+
+def published_file(path: str) -> str:
+    """Return the file an html asset is currently published as.
+
+    Args:
+        path: plain path of the asset, like `css/style.css`
+
+    Returns:
+        The path itself if it exists, else the path of the asset published
+        under its fingerprinted name, see `AssetStore.fingerprint()`, None if
+        the asset is not found
+    """
+    if os.path.isfile(path):
+        return path
+    directory = os.path.dirname(path)
+    if os.path.isdir(directory):
+        for i_file in sorted(os.listdir(directory)):
+            i_file = os.path.join(directory, i_file)
+            if FINGERPRINT_REGEXP.sub("", i_file) == path:
+                return i_file
+    return None
+
+
+def fingerprinted_name(path: str, digest: str) -> str:
+    """Return the fingerprinted name of a file.
+
+    Args:
+        path: path of the file, like `css/style.css`
+        digest: content hash of the file
+
+    Returns:
+        Path with the start of the hash before the extension, like
+        `css/style.0123456789.css`
+    """
+    root, ext = os.path.splitext(path)
+    return f"{root}.{digest[:FINGERPRINT_LENGTH]}{ext}"
+
+
+class AssetStore:
+    """Store files under their content hash and link them into outputs."""
+
+    INDEX = "index.json"
+
+    def __init__(self, store_dir: str) -> None:
+        """Initialize AssetStore objects.
+
+        Args:
+            store_dir: directory where objects and the hashes index are stored
+        """
+        self.store_dir = store_dir
+        self.hasher = FileHasher()
+        self.stats = {"link": 0, "reflink": 0, "copy": 0, "unchanged": 0}
+
+    def load(self) -> None:
+        """Load hashes of files known from previous builds."""
+        try:
+            with open(
+                os.path.join(self.store_dir, self.INDEX), "r", encoding="UTF-8"
+            ) as index_file:
+                self.hasher = FileHasher(json.load(index_file))
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.hasher = FileHasher()
+
+    def save(self) -> None:
+        """Save hashes of known files for the next build."""
+        os.makedirs(self.store_dir, exist_ok=True)
+        with open(
+            os.path.join(self.store_dir, self.INDEX), "w", encoding="UTF-8"
+        ) as index_file:
+            json.dump(self.hasher.cache, index_file, indent=2, sort_keys=True)
+
+    def object_path(self, digest: str) -> str:
+        """Return the path of a stored object.
+
+        Args:
+            digest: content hash of the object
+
+        Returns:
+            Path of the object in the store
+        """
+        return os.path.join(self.store_dir, "objects", digest[:2], digest[2:])
+
+    def add(self, path: str) -> str:
+        """Add a file to the store if its content is not stored yet.
+
+        Args:
+            path: file to store
+
+        Returns:
+            Content hash of the file
+        """
+        digest = self.hasher.file(path)
+        stored = self.object_path(digest)
+        if not os.path.isfile(stored):
+            os.makedirs(os.path.dirname(stored), exist_ok=True)
+            shutil.copy2(path, f"{stored}.tmp")
+            os.chmod(f"{stored}.tmp", 0o444)
+            os.replace(f"{stored}.tmp", stored)
+        return digest
+
+    def link(self, src: str, dest: str) -> None:
+        """Create dest as a hardlink, a reflink or a copy of src.
+
+        Args:
+            src: existing file
+            dest: file to create
+        """
+        try:
+            os.link(src, dest)
+            self.stats["link"] += 1
+            return
+        except OSError as error:
+            if error.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                raise
+        try:
+            with open(src, "rb") as src_file, open(dest, "wb") as dest_file:
+                fcntl.ioctl(dest_file.fileno(), FICLONE, src_file.fileno())
+            shutil.copystat(src, dest)
+            self.stats["reflink"] += 1
+        except OSError:
+            shutil.copy2(src, dest)
+            self.stats["copy"] += 1
+
+    def materialize(self, src: str, dest: str) -> str:
+        """Make dest hold the content of src, linking it from the store.
+
+        Nothing is done if dest is already a link to the stored object.
+
+        Args:
+            src: source file
+            dest: destination file
+
+        Returns:
+            Content hash of the file
+        """
+        digest = self.add(src)
+        stored = self.object_path(digest)
+        if os.path.exists(dest):
+            if os.path.samefile(stored, dest):
+                self.stats["unchanged"] += 1
+                return digest
+            os.remove(dest)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        self.link(stored, dest)
+        return digest
+
+    def sync_tree(self, src: str, dest: str, exclude: list = None) -> None:
+        """Materialise every file of src into dest.
+
+        Args:
+            src: source file or directory
+            dest: destination file or directory
+            exclude: list of directories and files, relative to src, not to
+                     materialise
+        """
+        if os.path.isfile(src):
+            self.materialize(src, dest)
+            return
+        for root, dirs, filenames in os.walk(src, followlinks=True):
+            dirs[:] = [
+                i_dir
+                for i_dir in dirs
+                if os.path.relpath(os.path.join(root, i_dir), src)
+                not in (exclude or [])
+            ]
+            for i_file in filenames:
+                i_src = os.path.join(root, i_file)
+                if os.path.relpath(i_src, src) in (exclude or []):
+                    continue
+                self.materialize(
+                    i_src, os.path.join(dest, os.path.relpath(i_src, src))
+                )
+
+    def fingerprint(self, root: str, extensions: tuple) -> dict:
+        """Publish files of a directory under their fingerprinted name.
+
+        Files are moved to their fingerprinted name. Fingerprinted files of
+        previous builds are kept when their file was not produced again, like
+        a rendered stylesheet skipped by an incremental build, and removed
+        otherwise.
+
+        Args:
+            root: directory storing the files, like the html output
+            extensions: extensions of the files to fingerprint
+
+        Returns:
+            Dictionary mapping path of each file, relative to root, to its
+            fingerprinted path
+        """
+        mapping = {}
+        published = set()
+        for dirpath, dirs, filenames in os.walk(root):
+            dirs[:] = [i_dir for i_dir in dirs if i_dir != "assets"]
+            for i_file in filenames:
+                path = os.path.relpath(os.path.join(dirpath, i_file), root)
+                if not path.endswith(extensions):
+                    continue
+                if FINGERPRINT_REGEXP.search(path):
+                    published.add(path)
+                    continue
+                mapping[path] = fingerprinted_name(
+                    path, self.hasher.file(os.path.join(root, path))
+                )
+        for path, fingerprinted in sorted(mapping.items()):
+            self.materialize(
+                os.path.join(root, path), os.path.join(root, fingerprinted)
+            )
+            os.remove(os.path.join(root, path))
+        for path in sorted(published - set(mapping.values())):
+            if FINGERPRINT_REGEXP.sub("", path) in mapping:
+                os.remove(os.path.join(root, path))
+            else:
+                mapping[FINGERPRINT_REGEXP.sub("", path)] = path
+        return mapping
+
+    @staticmethod
+    def rewrite_references(page: str, root: str, mapping: dict) -> bool:
+        """Make a page reference the current fingerprinted assets.
+
+        References to an asset, by its plain or a previous fingerprinted
+        name, in `href` and `src` attributes are replaced by its current
+        fingerprinted name.
+
+        Args:
+            page: path of the html page
+            root: directory paths of the mapping are relative to
+            mapping: dictionary as returned by `fingerprint()`
+
+        Returns:
+            True if the page was rewritten, False if its references were
+            already up to date
+        """
+        page_dir = os.path.relpath(os.path.dirname(page), root)
+
+        def rewrite(match: re.Match) -> str:
+            path = os.path.normpath(os.path.join(page_dir, match.group(2)))
+            path = FINGERPRINT_REGEXP.sub("", path)
+            if path not in mapping:
+                return match.group(0)
+            url = os.path.relpath(mapping[path], page_dir)
+            return f'{match.group(1)}="{url}"'
+
+        with open(page, "r", encoding="UTF-8") as page_file:
+            content = page_file.read()
+        rewritten = REFERENCE_REGEXP.sub(rewrite, content)
+        return rewritten != content and write_file(page, rewritten)
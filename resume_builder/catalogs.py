@@ -0,0 +1,125 @@
+"""Compile and load gettext catalogs in process.
+
+Catalogs of every locale are compiled with the Babel API rather than by
+running `pybabel compile`, and only when their `.po` file is newer than the
+`.mo` file, so a build with unchanged translations does not start another
+interpreter nor rewrite any file. Compiled catalogs are then loaded once per
+locale and shared by every build type. Babel is only imported once a catalog
+is compiled or loaded.
+"""
+
+from __future__ import annotations
+
+# Python Core Library
+# -----------------------------------------------------------------------------
+# https://docs.python.org/3/library/logging.html
+# Logging facility for Python
+import logging
+
+# https://docs.python.org/3/library/os.html
+# Miscellaneous operating system interfaces
+import os
+
+# https://docs.python.org/3/library/typing.html
+# Support for type hints
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    # https://pypi.org/project/Babel/
+    # Internationalization utilities
+    from babel.support import Translations
+
+
+class Catalogs:
+    """Compile gettext catalogs and keep them loaded in memory."""
+
+    DOMAIN = "messages"
+
+    def __init__(self, locale_dir: str, logger: logging.Logger) -> None:
+        """Initialize Catalogs objects.
+
+        Args:
+            locale_dir: directory storing a `LC_MESSAGES` directory per locale
+            logger: logger used to report compiled catalogs
+        """
+        self.locale_dir = locale_dir
+        self.logger = logger
+        self.loaded = {}
+
+    def __getstate__(self) -> dict:
+        """Return the state to pickle, without the loaded catalogs.
+
+        Returns:
+            Attributes of the object, catalogs being loaded again when first
+            used by another process
+        """
+        state = dict(self.__dict__)
+        state["loaded"] = {}
+        return state
+
+    def path(self, curr_locale: str, ext: str) -> str:
+        """Return the path of a catalog file of a locale.
+
+        Args:
+            curr_locale: locale of the catalog (like en_US)
+            ext: extension of the file, either `po` or `mo`
+
+        Returns:
+            Path of the catalog file
+        """
+        return os.path.join(
+            self.locale_dir, curr_locale, "LC_MESSAGES", f"{self.DOMAIN}.{ext}"
+        )
+
+    def compile(self) -> list:
+        """Compile catalogs whose `.po` file changed since their compilation.
+
+        Like `pybabel compile -f`, fuzzy translations are compiled too.
+
+        Returns:
+            List of locales whose catalog was compiled
+        """
+        compiled = []
+        for i_locale in sorted(os.listdir(self.locale_dir)):
+            po_path = self.path(i_locale, "po")
+            mo_path = self.path(i_locale, "mo")
+            if not os.path.isfile(po_path):
+                continue
+            if os.path.isfile(mo_path) and (
+                os.stat(mo_path).st_mtime_ns >= os.stat(po_path).st_mtime_ns
+            ):
+                continue
+            # pylint: disable=C0415
+            from babel.messages.mofile import write_mo
+            from babel.messages.pofile import read_po
+
+            with open(po_path, "rb") as po_file:
+                catalog = read_po(po_file, i_locale)
+            for message, errors in catalog.check():
+                for i_error in errors:
+                    # pylint: disable=W1203
+                    self.logger.error(f"{po_path}:{message.lineno}: {i_error}")
+            with open(f"{mo_path}.{os.getpid()}", "wb") as mo_file:
+                write_mo(mo_file, catalog, use_fuzzy=True)
+            os.replace(f"{mo_path}.{os.getpid()}", mo_path)
+            self.loaded.pop(i_locale, None)
+            compiled.append(i_locale)
+        return compiled
+
+    def translations(self, curr_locale: str) -> Translations:
+        """Return the translations of a locale, loaded once.
+
+        Args:
+            curr_locale: locale of the translations (like en_US)
+
+        Returns:
+            Translations of the locale
+        """
+        if curr_locale not in self.loaded:
+            # pylint: disable=C0415
+            from babel.support import Translations
+
+            self.loaded[curr_locale] = Translations.load(
+                self.locale_dir, [curr_locale], self.DOMAIN
+            )
+        return self.loaded[curr_locale]
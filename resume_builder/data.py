@@ -0,0 +1,148 @@
+"""Load YAML data files with libyaml and cache their parsed content.
+
+Data files are parsed with the libyaml based `CSafeLoader` when PyYAML was
+built with it, falling back to the pure Python `SafeLoader` otherwise. The
+parsed content of each file is also stored in the cache directory as a pickle
+named after the hash of the file content, so later builds, and rebuilds of the
+same process, only parse files which changed. Content hashes are memoized on
+the mtime and size of the files, so unchanged files are not even read.
+
+PyYAML is only imported once data files are loaded, not when the module is.
+"""
+
+# Python Core Library
+# -----------------------------------------------------------------------------
+# https://docs.python.org/3/library/functools.html
+# Higher-order functions and operations on callable objects
+import functools
+
+# https://docs.python.org/3/library/hashlib.html
+# Secure hashes and message digests
+import hashlib
+
+# https://docs.python.org/3/library/json.html
+# JSON encoder and decoder
+import json
+
+# https://docs.python.org/3/library/os.html
+# Miscellaneous operating system interfaces
+import os
+
+# https://docs.python.org/3/library/pickle.html
+# Python object serialization
+import pickle
+
+# Local Library
+# -----------------------------------------------------------------------------
+# Compute content hashes of files
+from resume_builder.manifest import FileHasher
+
+
+@functools.cache
+def safe_loader():
+    """Return the fastest safe YAML loader available.
+
+    Returns:
+        `CSafeLoader` when PyYAML was built with libyaml, `SafeLoader`
+        otherwise
+    """
+    # pylint: disable=C0415
+    import yaml
+
+    return getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+class DataLoader:
+    """Load YAML files, reusing their parsed content between builds."""
+
+    INDEX = "index.json"
+
+    def __init__(self, cache_dir: str = None) -> None:
+        """Initialize DataLoader objects.
+
+        Args:
+            cache_dir: directory where parsed files are stored, files are
+                       always parsed if None
+        """
+        self.cache_dir = cache_dir
+        self.hasher = FileHasher()
+        self.stats = {"parsed": 0, "cached": 0}
+
+    def load_index(self) -> None:
+        """Load hashes of files known from previous builds."""
+        if not self.cache_dir:
+            return
+        try:
+            with open(
+                os.path.join(self.cache_dir, self.INDEX), "r", encoding="UTF-8"
+            ) as index_file:
+                self.hasher = FileHasher(json.load(index_file))
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.hasher = FileHasher()
+
+    def save_index(self) -> None:
+        """Save hashes of known files for the next build."""
+        if not self.cache_dir:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(
+            os.path.join(self.cache_dir, self.INDEX), "w", encoding="UTF-8"
+        ) as index_file:
+            json.dump(self.hasher.cache, index_file, indent=2, sort_keys=True)
+
+    def cache_path(self, path: str) -> str:
+        """Return the path where the parsed content of a file is stored.
+
+        Args:
+            path: path of the YAML file
+
+        Returns:
+            Path of the pickle, named after the hash of the file content, the
+            PyYAML version and the loader used
+        """
+        # pylint: disable=C0415
+        import yaml
+
+        key = hashlib.sha256(
+            "\0".join(
+                [
+                    self.hasher.file(path),
+                    yaml.__version__,
+                    safe_loader().__name__,
+                ]
+            ).encode("UTF-8")
+        ).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], f"{key[2:]}.pickle")
+
+    def load(self, path: str):
+        """Return the parsed content of a YAML file.
+
+        A new object is returned on every call, so the caller may modify it.
+
+        Args:
+            path: path of the YAML file
+
+        Returns:
+            Content of the YAML file
+        """
+        cache_path = self.cache_path(path) if self.cache_dir else None
+        if cache_path:
+            try:
+                with open(cache_path, "rb") as cache_file:
+                    data = pickle.load(cache_file)
+                self.stats["cached"] += 1
+                return data
+            except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+                pass
+        # pylint: disable=C0415
+        import yaml
+
+        with open(path, "r", encoding="UTF-8") as data_file:
+            data = yaml.load(data_file, Loader=safe_loader())
+        self.stats["parsed"] += 1
+        if cache_path:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            with open(f"{cache_path}.{os.getpid()}", "wb") as cache_file:
+                pickle.dump(data, cache_file, pickle.HIGHEST_PROTOCOL)
+            os.replace(f"{cache_path}.{os.getpid()}", cache_path)
+        return data
@@ -0,0 +1,288 @@
+"""Precompute dates and durations of the resume entries.
+
+Every entry of the data with a `start` date, like positions, projects or
+degrees, receives a `dates` field storing its start and end as date objects
+and its duration, computed once against a single pinned "now" for the whole
+build. Entries with `positions`, like companies, also receive a
+`positions_dates` field storing the total duration of their positions.
+
+Templates of both families then only format these fields instead of parsing
+ISO dates and computing durations while rendering. Dates are formatted with
+Babel for an explicit locale, rather than with `strftime` and the locale of
+the process, so no locale has to be installed on the host nor set globally.
+
+The pinned "now" is read once per build by `build_clock()`, from the
+`SOURCE_DATE_EPOCH` environment variable or an explicit build date when set,
+so builds of the same inputs are reproducible.
+"""
+
+from __future__ import annotations
+
+# Python Core Library
+# -----------------------------------------------------------------------------
+# https://docs.python.org/3/library/datetime.html
+# Basic date and time types
+import datetime
+
+# https://docs.python.org/3/library/functools.html
+# Higher-order functions and operations on callable objects
+import functools
+
+# https://docs.python.org/3/library/os.html
+# Miscellaneous operating system interfaces
+import os
+
+# https://docs.python.org/3/library/re.html
+# Regular expression operations
+import re
+
+# https://docs.python.org/3/library/typing.html
+# Support for type hints
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    # https://pypi.org/project/python-dateutil/
+    # Extensions to the standard Python datetime module
+    # https://pypi.org/project/Babel/
+    # Internationalization utilities
+    from babel import Locale
+    from dateutil.relativedelta import relativedelta
+
+# CLDR date fields matching the `strftime` directives used by templates
+STRFTIME_FIELDS = {
+    "a": "EEE",
+    "A": "EEEE",
+    "b": "MMM",
+    "B": "MMMM",
+    "d": "dd",
+    "m": "MM",
+    "y": "yy",
+    "Y": "y",
+}
+STRFTIME_DIRECTIVE = re.compile(r"%(.)")
+
+
+def build_clock(build_date: datetime.datetime = None) -> tuple:
+    """Return the date and time the build is pinned to.
+
+    The clock is pinned to `build_date` when given, else to the
+    `SOURCE_DATE_EPOCH` environment variable when set, see
+    https://reproducible-builds.org/specs/source-date-epoch/, else to the
+    current local time. Pinned clocks are expressed in UTC so outputs do not
+    depend on the time zone of the host.
+
+    Args:
+        build_date: date and time to pin the build to, in UTC if naive
+
+    Returns:
+        Tuple storing the naive datetime of the build and its Unix timestamp,
+        None if the clock is not pinned
+
+    Raises:
+        ValueError: if `SOURCE_DATE_EPOCH` is not an integer
+    """
+    if build_date is None and os.environ.get("SOURCE_DATE_EPOCH"):
+        build_date = datetime.datetime.fromtimestamp(
+            int(os.environ["SOURCE_DATE_EPOCH"]), datetime.timezone.utc
+        )
+    if build_date is None:
+        return datetime.datetime.now(), None
+    if build_date.tzinfo is None:
+        build_date = build_date.replace(tzinfo=datetime.timezone.utc)
+    build_date = build_date.astimezone(datetime.timezone.utc)
+    return build_date.replace(tzinfo=None), int(build_date.timestamp())
+
+
+def parse_date(value) -> datetime.date:
+    """Return a date from an ISO formatted string or a date.
+
+    Args:
+        value: ISO formatted date, like `2020-01-31`, or date parsed by YAML
+
+    Returns:
+        Date object, None if value is empty
+    """
+    if not value:
+        return None
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.date.fromisoformat(value)
+
+
+@functools.cache
+def cldr_pattern(str_format: str) -> str:
+    """Convert a `strftime` format into a CLDR date pattern.
+
+    Args:
+        str_format: format using `strftime` directives, like `%B %Y`
+
+    Returns:
+        Equivalent CLDR pattern, like `MMMM y`, literal text being quoted
+
+    Raises:
+        ValueError: if the format uses a directive without CLDR equivalent
+    """
+    pattern = []
+    position = 0
+    for match in STRFTIME_DIRECTIVE.finditer(str_format):
+        literal = str_format[position : match.start()]
+        if match.group(1) == "%":
+            literal += "%"
+        elif match.group(1) not in STRFTIME_FIELDS:
+            raise ValueError(
+                f"Unsupported directive %{match.group(1)} in {str_format!r}"
+            )
+        if literal:
+            pattern.append("'" + literal.replace("'", "''") + "'")
+        if match.group(1) != "%":
+            pattern.append(STRFTIME_FIELDS[match.group(1)])
+        position = match.end()
+    if str_format[position:]:
+        pattern.append("'" + str_format[position:].replace("'", "''") + "'")
+    return "".join(pattern)
+
+
+@functools.cache
+def babel_locale(curr_locale: str) -> Locale:
+    """Return the Babel locale of a locale code, parsed once.
+
+    Args:
+        curr_locale: locale code (like en_US)
+
+    Returns:
+        Babel locale
+    """
+    # pylint: disable=C0415
+    from babel import Locale
+
+    return Locale.parse(curr_locale)
+
+
+def format_date(
+    date: datetime.date, str_format: str = "%B %Y", curr_locale: str = "en_US"
+) -> str:
+    """Format a date for a locale.
+
+    Args:
+        date: date or datetime object
+        str_format: output format of the date, using `strftime` directives
+        curr_locale: locale whose month and day names are used (like en_US)
+
+    Returns:
+        String of the formatted date
+    """
+    # pylint: disable=C0415
+    from babel.dates import format_date as babel_format_date
+
+    return babel_format_date(
+        date, cldr_pattern(str_format), locale=babel_locale(curr_locale)
+    )
+
+
+def round_duration(duration: relativedelta) -> tuple:
+    """Round a duration to months, as done for companies durations.
+
+    A month is counted when more than 15 days remain.
+
+    Args:
+        duration: duration to round
+
+    Returns:
+        Tuple `(years, months)`
+    """
+    years = duration.years
+    months = duration.months + 1 if duration.days > 15 else duration.months
+    if months == 12:
+        months = 0
+        years += 1
+    return years, months
+
+
+def entry_dates(entry: dict, today: datetime.date) -> dict:
+    """Return dates of an entry with a start date.
+
+    Args:
+        entry: entry of the data, with `start` and optional `end` keys
+        today: pinned current date, used as end of ongoing entries
+
+    Returns:
+        Dictionary storing `start`, `end` (None when ongoing), `current` and
+        `duration` of the entry
+    """
+    # pylint: disable=C0415
+    from dateutil.relativedelta import relativedelta
+
+    start = parse_date(entry["start"])
+    end = parse_date(entry.get("end"))
+    return {
+        "start": start,
+        "end": end,
+        "current": end is None,
+        "duration": relativedelta(end or today, start),
+    }
+
+
+def positions_dates(positions: list) -> dict:
+    """Return dates and total duration of a list of positions.
+
+    Positions are expected from the most recent to the oldest, the total
+    duration being the sum of the rounded duration of each position.
+
+    Args:
+        positions: list of positions, with their `dates` already computed
+
+    Returns:
+        Dictionary storing `start` and `end` of the last listed, i.e. the
+        oldest, position, as templates always used the dates of the last
+        position of their loop, `current` if any position is ongoing, and the
+        total `years` and `months`
+    """
+    years = months = 0
+    for i_position in positions:
+        position_years, position_months = round_duration(
+            i_position["dates"]["duration"]
+        )
+        years += position_years
+        months += position_months
+    if months >= 12:
+        months -= 12
+        years += 1
+    return {
+        "start": positions[-1]["dates"]["start"],
+        "end": positions[-1]["dates"]["end"],
+        "current": any(i["dates"]["current"] for i in positions),
+        "years": years,
+        "months": months,
+    }
+
+
+def add_dates(data, today: datetime.date, visited: set = None) -> None:
+    """Add precomputed dates to every dated entry of the data.
+
+    Args:
+        data: data of a locale, or part of it
+        today: pinned current date, used as end of ongoing entries
+        visited: ids of objects already processed, as YAML aliases share
+                 objects between entries
+    """
+    visited = visited if visited is not None else set()
+    if id(data) in visited:
+        return
+    visited.add(id(data))
+    if isinstance(data, list):
+        for i_item in data:
+            add_dates(i_item, today, visited)
+    elif isinstance(data, dict):
+        for i_value in list(data.values()):
+            add_dates(i_value, today, visited)
+        if data.get("start"):
+            data["dates"] = entry_dates(data, today)
+        positions = data.get("positions")
+        if (
+            isinstance(positions, list)
+            and positions
+            and all(isinstance(i, dict) and "dates" in i for i in positions)
+        ):
+            data["positions_dates"] = positions_dates(positions)
@@ -0,0 +1,229 @@
+"""Subset webfonts of the html output to the glyphs actually used.
+
+The html output ships the complete FuraCode Nerd Font and Font Awesome fonts
+in five formats each while pages only use a handful of their glyphs. This
+module scans the rendered pages and scripts for the characters and Font
+Awesome icon classes they use, subsets each font to these glyphs as a single
+`woff2` file and rewrites `@font-face` rules of the stylesheets to only
+reference the subset fonts.
+
+Subsetting requires `fonttools` with `brotli` (`pip install fonttools[woff]`).
+"""
+
+# Python Core Library
+# -----------------------------------------------------------------------------
+# https://docs.python.org/3/library/hashlib.html
+# Secure hashes and message digests
+import hashlib
+
+# https://docs.python.org/3/library/html.html
+# HyperText Markup Language support
+import html
+
+# https://docs.python.org/3/library/logging.html
+# Logging facility for Python
+import logging
+
+# https://docs.python.org/3/library/os.html
+# Miscellaneous operating system interfaces
+import os
+
+# https://docs.python.org/3/library/re.html
+# Regular expression operations
+import re
+import shutil
+
+# Local Library
+# -----------------------------------------------------------------------------
+# Replace files of the output without modifying stored assets
+from resume_builder.assets import write_file
+
+# List files of the html output
+from resume_builder.optimize import output_files
+
+FONT_FACE_REGEXP = re.compile(r"@font-face\s*\{[^}]*\}")
+FONT_SRC_REGEXP = re.compile(r"(\s*)src\s*:[^;]*;")
+FONT_URL_REGEXP = re.compile(r"url\(\s*['\"]?([^'\")]+)['\"]?\s*\)")
+ICON_CLASS_REGEXP = re.compile(r"\bfa-[a-z0-9-]+")
+ICON_RULE_REGEXP = re.compile(
+    r"((?:\.fa-[a-z0-9-]+:before\s*,?\s*)+)\{\s*content:\s*\"\\([0-9a-f]+)\""
+)
+CSS_CONTENT_REGEXP = re.compile(r"content\s*:\s*\"\\([0-9a-fA-F]+)\"")
+
+
+class FontSubsetter:
+    """Subset webfonts of an html output directory."""
+
+    FONT_DIR = os.path.join("css", "webfonts")
+    FONT_AWESOME_CSS = os.path.join("css", "lib", "font_awesome.css")
+    FONT_CSS = [os.path.join("css", "fonts.css"), FONT_AWESOME_CSS]
+    # Printable ASCII is always kept as text may be generated by scripts
+    BASE_CHARACTERS = {chr(i_char) for i_char in range(0x20, 0x7F)}
+
+    def __init__(
+        self,
+        static_dir: str,
+        output_dir: str,
+        cache_dir: str,
+        logger: logging.Logger,
+    ) -> None:
+        """Initialize FontSubsetter objects.
+
+        Args:
+            static_dir: static html directory storing the complete fonts
+            output_dir: html output directory whose pages are scanned
+            cache_dir: directory where subset fonts are cached
+            logger: logger used to report subset fonts
+        """
+        self.static_dir = static_dir
+        self.output_dir = output_dir
+        self.cache_dir = cache_dir
+        self.logger = logger
+
+    def output_files(self, extensions: tuple) -> list:
+        """Return pages, scripts or stylesheets of the output directory.
+
+        Args:
+            extensions: tuple of extensions, like `(".html", ".js")`
+
+        Returns:
+            Sorted list of files path
+        """
+        return output_files(self.output_dir, extensions)
+
+    def read(self, path: str) -> str:
+        """Return the content of a file of the output directory.
+
+        Args:
+            path: path of the file, absolute or relative to output directory
+
+        Returns:
+            Content of the file
+        """
+        with open(
+            os.path.join(self.output_dir, path), "r", encoding="UTF-8"
+        ) as read_file:
+            return read_file.read()
+
+    def used_codepoints(self) -> tuple:
+        """Return codepoints used by pages, scripts and stylesheets.
+
+        Returns:
+            Tuple of two sets, codepoints of text characters and codepoints of
+            Font Awesome icons
+        """
+        characters = set(self.BASE_CHARACTERS)
+        icons = set()
+        for i_file in self.output_files((".html", ".js")):
+            content = self.read(i_file)
+            characters.update(html.unescape(content))
+            icons.update(ICON_CLASS_REGEXP.findall(content))
+        for i_file in self.output_files((".css",)):
+            if i_file.endswith(self.FONT_AWESOME_CSS):
+                continue
+            characters.update(
+                chr(int(i_code, 16))
+                for i_code in CSS_CONTENT_REGEXP.findall(self.read(i_file))
+            )
+        icon_codepoints = set()
+        for selectors, code in ICON_RULE_REGEXP.findall(
+            self.read(self.FONT_AWESOME_CSS)
+        ):
+            if icons.intersection(re.findall(r"fa-[a-z0-9-]+", selectors)):
+                icon_codepoints.add(int(code, 16))
+        return {ord(i_char) for i_char in characters}, icon_codepoints
+
+    def subset_font(self, name: str, codepoints: set) -> str:
+        """Subset a font to the given codepoints as woff2.
+
+        Subset fonts are cached by hash of the source font and codepoints.
+
+        Args:
+            name: name of the font in the static font directory, without
+                  extension
+            codepoints: set of unicode codepoints to keep
+
+        Returns:
+            Path of the subset font in the cache directory
+        """
+        # pylint: disable=C0415
+        from fontTools import subset
+
+        logging.getLogger("fontTools").setLevel(logging.ERROR)
+
+        src = os.path.join(self.static_dir, self.FONT_DIR, f"{name}.ttf")
+        digest = hashlib.sha256()
+        with open(src, "rb") as src_file:
+            digest.update(src_file.read())
+        digest.update(",".join(str(i) for i in sorted(codepoints)).encode())
+        dest = os.path.join(
+            self.cache_dir, f"{name}.{digest.hexdigest()}.woff2"
+        )
+        if os.path.isfile(dest):
+            return dest
+        options = subset.Options()
+        options.flavor = "woff2"
+        options.layout_features = ["*"]
+        options.notdef_outline = True
+        # FontForge timestamps, which fontTools can not subset
+        options.drop_tables += ["FFTM"]
+        font = subset.load_font(src, options)
+        subsetter = subset.Subsetter(options)
+        subsetter.populate(unicodes=codepoints)
+        subsetter.subset(font)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        subset.save_font(font, f"{dest}.tmp", options)
+        os.replace(f"{dest}.tmp", dest)
+        return dest
+
+    def rewrite_font_faces(self, css_file: str, codepoints: set) -> None:
+        """Subset fonts of a stylesheet and only reference the woff2 subsets.
+
+        Args:
+            css_file: stylesheet, relative to the output directory
+            codepoints: set of unicode codepoints to keep in its fonts
+        """
+
+        def rewrite(match: re.Match) -> str:
+            font_face = match.group(0)
+            url = FONT_URL_REGEXP.search(font_face).group(1)
+            url = re.split(r"[?#]", url)[0]
+            name = os.path.splitext(os.path.basename(url))[0]
+            subset_file = self.subset_font(name, codepoints)
+            shutil.copy2(
+                subset_file,
+                os.path.join(self.output_dir, self.FONT_DIR, f"{name}.woff2"),
+            )
+            new_src = (
+                f"src: url('{os.path.dirname(url)}/{name}.woff2') "
+                + "format('woff2');"
+            )
+            # Replace the first `src` declaration, drop the following ones
+            first = FONT_SRC_REGEXP.search(font_face)
+            return (
+                font_face[: first.start()]
+                + first.group(1)
+                + new_src
+                + FONT_SRC_REGEXP.sub("", font_face[first.end() :])
+            )
+
+        content = FONT_FACE_REGEXP.sub(rewrite, self.read(css_file))
+        write_file(os.path.join(self.output_dir, css_file), content)
+
+    def run(self) -> None:
+        """Subset every font of the output and update the stylesheets."""
+        characters, icons = self.used_codepoints()
+        # pylint: disable=W1203
+        self.logger.info(
+            f"Subsetting webfonts to {len(characters)} characters and "
+            + f"{len(icons)} icons."
+        )
+        font_dir = os.path.join(self.output_dir, self.FONT_DIR)
+        os.makedirs(font_dir, exist_ok=True)
+        for i_file in os.listdir(font_dir):
+            os.remove(os.path.join(font_dir, i_file))
+        for i_css in self.FONT_CSS:
+            self.rewrite_font_faces(
+                i_css,
+                icons if i_css == self.FONT_AWESOME_CSS else characters,
+            )
@@ -0,0 +1,285 @@
+"""Cache of rendered fragments of pages, such as the sections of a resume.
+
+Pages render each of their sections with the `fragment()` function rather
+than with `include`. The section template is rendered with the context of the
+page, like an `include` would, and its output is stored under a key hashing:
+
+* the source of the section template and of every template it references,
+* the value of every variable these templates use,
+* the state of the namespaces shared with the page, like `ns`,
+* a scope given by the builder, i.e. the locale, its translations, the pinned
+  date of the build and the code of the builder.
+
+When a single data file changes, only the sections using it are rendered
+again, others being reassembled from the cache, in memory or in the cache
+directory. As sections may update shared namespaces, their state after the
+rendering is stored with the output and restored when it is reused.
+Sections referencing templates through a dynamic name cannot be hashed and
+are always rendered.
+
+As this module imports jinja2, it is only imported by the builder once a
+template has to be rendered.
+"""
+
+# Python Core Library
+# -----------------------------------------------------------------------------
+# https://docs.python.org/3/library/collections.html
+# Container datatypes
+import collections
+
+# https://docs.python.org/3/library/functools.html
+# Higher-order functions and operations on callable objects
+import functools
+
+# https://docs.python.org/3/library/hashlib.html
+# Secure hashes and message digests
+import hashlib
+
+# https://docs.python.org/3/library/os.html
+# Miscellaneous operating system interfaces
+import os
+
+# https://docs.python.org/3/library/pickle.html
+# Python object serialization
+import pickle
+
+# Third-Party Library
+# -----------------------------------------------------------------------------
+# A very fast and expressive template engine.
+import jinja2
+from jinja2 import meta
+from jinja2.utils import Namespace
+
+# Local Library
+# -----------------------------------------------------------------------------
+# Compute content hashes of files
+from resume_builder.manifest import FileHasher
+
+
+class FragmentCache:
+    """Render fragments of pages, reusing outputs of unchanged ones."""
+
+    def __init__(self, cache_dir: str = None, maxsize: int = 1024) -> None:
+        """Initialize FragmentCache objects.
+
+        Args:
+            cache_dir: directory where rendered fragments are stored,
+                       fragments are only kept in memory if None
+            maxsize: maximum number of fragments kept in memory
+        """
+        self.cache_dir = cache_dir
+        self.maxsize = maxsize
+        self.cache = collections.OrderedDict()
+        self.analyses = {}
+        self.hasher = FileHasher()
+        self.stats = {"rendered": 0, "cached": 0}
+
+    def bind(self, scope: str, files: list):
+        """Return the `fragment()` function of the templates of a scope.
+
+        Args:
+            scope: values the rendering depends on beside templates and
+                   variables, like the locale and the date of the build
+            files: files the rendering depends on, like the code of the
+                   builder and the compiled translations
+
+        Returns:
+            Function rendering a fragment, to register as a jinja2 global
+        """
+        digest = hashlib.sha256(scope.encode("UTF-8"))
+        for i_file in files:
+            digest.update(f"\0{self.hasher.file(i_file)}".encode("UTF-8"))
+        return jinja2.pass_context(
+            functools.partial(self.render, digest.hexdigest())
+        )
+
+    def analyse(self, environment: jinja2.Environment, source: str) -> tuple:
+        """Return variables and templates referenced by a template source.
+
+        Args:
+            environment: jinja2 environment parsing the template
+            source: source of the template
+
+        Returns:
+            Tuple storing the set of variables used by the template and the
+            list of the templates it references, None for dynamic names
+        """
+        key = hashlib.sha256(
+            f"{environment.block_start_string}\0{source}".encode("UTF-8")
+        ).hexdigest()
+        if key not in self.analyses:
+            ast = environment.parse(source)
+            self.analyses[key] = (
+                meta.find_undeclared_variables(ast),
+                list(meta.find_referenced_templates(ast)),
+            )
+        return self.analyses[key]
+
+    def sources(self, environment: jinja2.Environment, name: str) -> tuple:
+        """Return sources and variables of a template and its references.
+
+        Args:
+            environment: jinja2 environment loading the template
+            name: name of the template
+
+        Returns:
+            Tuple storing the sorted list of `(name, source)` of the template
+            and every template it references, and the set of variables they
+            use, None if a template is referenced through a dynamic name
+        """
+        sources = {}
+        variables = set()
+        pending = [name]
+        while pending:
+            curr_name = pending.pop()
+            if curr_name in sources:
+                continue
+            loader = environment.loader
+            source, _, _ = loader.get_source(environment, curr_name)
+            names, references = self.analyse(environment, source)
+            if None in references:
+                return None
+            sources[curr_name] = source
+            variables.update(names)
+            pending.extend(references)
+        return sorted(sources.items()), variables
+
+    @staticmethod
+    def key(scope: str, analysis: tuple, variables: dict, states: dict) -> str:
+        """Return the cache key of a fragment.
+
+        Args:
+            scope: digest of the scope the fragment is rendered in
+            analysis: sources of the templates rendered and variables they
+                      use, as returned by `sources()`
+            variables: variables of the context the fragment is rendered with
+            states: attributes of the namespaces shared with the page
+
+        Returns:
+            Hash of every input of the fragment
+        """
+        sources, used = analysis
+        # Templates calling `context()` may use any variable
+        if "context" in used:
+            used = set(variables)
+        # Functions, like globals of the environment, are part of the code
+        values = {
+            i_name: variables[i_name]
+            for i_name in sorted(used)
+            if i_name in variables
+            and i_name not in states
+            and not callable(variables[i_name])
+        }
+        digest = hashlib.sha256(scope.encode("UTF-8"))
+        for name, source in sources:
+            digest.update(f"\0{name}\0{source}".encode("UTF-8"))
+        for i_value in (values, states):
+            digest.update(f"\0{i_value!r}".encode("UTF-8"))
+        return digest.hexdigest()
+
+    def load(self, key: str) -> bytes:
+        """Return a stored fragment.
+
+        Args:
+            key: cache key of the fragment
+
+        Returns:
+            Pickled output and namespace states, None if not stored
+        """
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self.path(key), "rb") as cache_file:
+                return self.remember(key, cache_file.read())
+        except FileNotFoundError:
+            return None
+
+    def store(self, key: str, data: bytes) -> None:
+        """Store a fragment in memory and in the cache directory.
+
+        Args:
+            key: cache key of the fragment
+            data: pickled output and namespace states
+        """
+        self.remember(key, data)
+        if not self.cache_dir:
+            return
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(f"{path}.{os.getpid()}", "wb") as cache_file:
+            cache_file.write(data)
+        os.replace(f"{path}.{os.getpid()}", path)
+
+    def remember(self, key: str, data: bytes) -> bytes:
+        """Keep a fragment in memory.
+
+        Args:
+            key: cache key of the fragment
+            data: pickled output and namespace states
+
+        Returns:
+            The stored data
+        """
+        self.cache[key] = data
+        if len(self.cache) > self.maxsize:
+            self.cache.popitem(last=False)
+        return data
+
+    def path(self, key: str) -> str:
+        """Return the path where a fragment is stored.
+
+        Args:
+            key: cache key of the fragment
+
+        Returns:
+            Path of the file in the cache directory
+        """
+        return os.path.join(self.cache_dir, key[:2], f"{key[2:]}.pickle")
+
+    def render(
+        self, scope: str, context: jinja2.runtime.Context, name: str, **kwargs
+    ) -> str:
+        """Render a fragment with the context of the page, or reuse it.
+
+        Args:
+            scope: digest of the scope, bound by `bind()`
+            context: context of the page rendering the fragment
+            name: name of the template of the fragment
+            kwargs: local variables of the page the fragment uses, like the
+                    loop variable of the sections
+
+        Returns:
+            Output of the fragment
+        """
+        environment = context.environment
+        variables = {**context.get_all(), **kwargs}
+        analysis = self.sources(environment, name)
+        if analysis is None:
+            self.stats["rendered"] += 1
+            return environment.get_template(name).render(variables)
+        # pylint: disable=W0212
+        states = {
+            key: value._Namespace__attrs
+            for key, value in variables.items()
+            if isinstance(value, Namespace)
+        }
+        key = self.key(scope, analysis, variables, states)
+        data = self.load(key)
+        if data is not None:
+            output, cached_states = pickle.loads(data)
+            for i_name, i_state in cached_states.items():
+                states[i_name].update(i_state)
+            self.stats["cached"] += 1
+            return output
+        output = environment.get_template(name).render(variables)
+        # States are the attributes of the namespaces themselves, so they are
+        # now the ones left by the rendering
+        self.store(
+            key,
+            pickle.dumps((output, states), pickle.HIGHEST_PROTOCOL),
+        )
+        self.stats["rendered"] += 1
+        return output
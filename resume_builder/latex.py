@@ -0,0 +1,397 @@
+"""Multi-pass LaTeX driver with a persistent cache of auxiliary files.
+
+Like `latexmk`, the driver reruns `lualatex` only while auxiliary files (table
+of contents, references, etc.) keep changing, up to a fixed number of passes.
+Auxiliary files and the produced PDF are kept in a cache directory which
+survives clean builds, together with the hash of every file read by the last
+successful run (as recorded by `lualatex -recorder`). When none of these
+inputs changed, the compilation is skipped and the cached PDF is restored.
+
+It also provides the environment used to run TeX tools so that luaotfload
+keeps its font names database and font cache in the cache directory, which
+can be persisted between ephemeral CI containers and warmed up beforehand.
+Optionally, the preamble of each document can be dumped once into a custom
+format, using `mylatexformat`, which later compilations load instead of
+processing the document class and fonts setup again.
+"""
+
+# Python Core Library
+# -----------------------------------------------------------------------------
+# https://docs.python.org/3/library/glob.html
+# Unix style pathname pattern expansion
+import glob
+
+# https://docs.python.org/3/library/hashlib.html
+# Secure hashes and message digests
+import hashlib
+
+# https://docs.python.org/3/library/json.html
+# JSON encoder and decoder
+import json
+
+# https://docs.python.org/3/library/os.html
+# Miscellaneous operating system interfaces
+import os
+import shutil
+
+# Local Library
+# -----------------------------------------------------------------------------
+# Compute content hashes of files
+from resume_builder.manifest import FileHasher
+
+# Error raised when a command fails
+from resume_builder.scheduler import JobError
+
+
+def tex_environment(
+    cache_dir: str, fonts_dir: str, source_date_epoch: int = None
+) -> dict:
+    """Return environment variables to use when running TeX tools.
+
+    `TEXMFVAR` and `TEXMFCACHE` point to the cache directory, where
+    luaotfload stores its font names database and font cache, and the fonts
+    of the repository are added to `OSFONTDIR` so they are found without
+    being installed on the host.
+
+    When the clock of the build is pinned, `SOURCE_DATE_EPOCH` is set to it,
+    which lualatex and Ghostscript use for the creation date and the
+    identifier of the PDF instead of the current time, and
+    `FORCE_SOURCE_DATE` makes the date primitives of TeX follow it as well.
+
+    Args:
+        cache_dir: directory where TeX caches are stored
+        fonts_dir: directory storing the fonts used by the resume
+        source_date_epoch: Unix timestamp the build is pinned to, the
+                           current time of each run if None
+
+    Returns:
+        Copy of the current environment updated with TeX variables
+    """
+    env = dict(os.environ)
+    texmf_var = os.path.join(cache_dir, "texmf-var")
+    env["TEXMFVAR"] = texmf_var
+    env["TEXMFCACHE"] = texmf_var
+    env["OSFONTDIR"] = os.pathsep.join(
+        [fonts_dir] + ([env["OSFONTDIR"]] if env.get("OSFONTDIR") else [])
+    )
+    if source_date_epoch is not None:
+        env["SOURCE_DATE_EPOCH"] = str(source_date_epoch)
+        env["FORCE_SOURCE_DATE"] = "1"
+    return env
+
+
+class LatexDriver:
+    """Compile a tex file with lualatex as many times as required."""
+
+    MAX_PASSES = 5
+    AUX_EXTENSIONS = [".aux", ".toc", ".out", ".lof", ".lot", ".nav", ".snm"]
+    # Files written next to the PDF, removed from the output once the state
+    # of a successful run is saved
+    OUTPUT_EXTENSIONS = AUX_EXTENSIONS + [".fls", ".log"]
+    # Environment variables changing the PDF produced, see `tex_environment`
+    STATE_ENV = ["SOURCE_DATE_EPOCH", "FORCE_SOURCE_DATE"]
+
+    # pylint: disable=R0913
+    def __init__(
+        self,
+        tex_file: str,
+        cwd: str,
+        output_dir: str,
+        cache_dir: str,
+        format_dir: str = None,
+    ) -> None:
+        """Initialize LatexDriver objects.
+
+        Args:
+            tex_file: tex file to compile, relative to `cwd`
+            cwd: directory from which lualatex is run
+            output_dir: directory, relative to `cwd`, where lualatex writes
+                        auxiliary files and the PDF
+            cache_dir: directory where auxiliary files, PDF and state of the
+                       last successful run are kept
+            format_dir: directory where preamble formats are dumped and
+                        reused, formats are not used if None
+        """
+        self.tex_file = tex_file
+        self.cwd = cwd
+        self.output_dir = output_dir
+        self.cache_dir = cache_dir
+        self.format_dir = format_dir
+        self.format_file = None
+        self.jobname = os.path.splitext(os.path.basename(tex_file))[0]
+
+    @property
+    def command(self) -> list:
+        """Return the lualatex command line."""
+        return [
+            "lualatex",
+            "-interaction=nonstopmode",
+            "-recorder",
+            *([f"-fmt={self.format_file}"] if self.format_file else []),
+            f"-output-directory={self.output_dir}",
+            self.tex_file,
+        ]
+
+    def format_name(self) -> str:
+        """Return the name of the format matching the document preamble.
+
+        The name includes a hash of the preamble and of the document classes
+        so a new format is dumped whenever one of them changes.
+
+        Returns:
+            Name of the format, without extension
+        """
+        digest = hashlib.sha256()
+        with open(
+            os.path.join(self.cwd, self.tex_file), "r", encoding="UTF-8"
+        ) as tex:
+            digest.update(tex.read().split("\\begin{document}")[0].encode())
+        for i_cls in sorted(glob.glob(os.path.join(self.cwd, "*.cls"))):
+            with open(i_cls, "rb") as cls:
+                digest.update(cls.read())
+        return f"{self.jobname}-{digest.hexdigest()[:16]}"
+
+    async def dump_format(self, scheduler, job: dict) -> None:
+        """Dump the preamble of the document into a format if not done yet.
+
+        When dumping the format fails, for instance when `mylatexformat` is
+        not installed, the document is compiled without format and the
+        failure is remembered so the same format is not dumped again.
+
+        Args:
+            scheduler: `JobScheduler` running the job
+            job: job the compilation belongs to
+        """
+        name = self.format_name()
+        format_file = os.path.join(self.format_dir, f"{name}.fmt")
+        failed_file = os.path.join(self.format_dir, f"{name}.failed")
+        if os.path.isfile(failed_file):
+            return
+        if not os.path.isfile(format_file):
+            os.makedirs(self.format_dir, exist_ok=True)
+            label = job["label"]
+            scheduler.logger.info("[%s] Dumping format %s.", label, name)
+            try:
+                await scheduler.run_command(
+                    job,
+                    [
+                        "lualatex",
+                        "-ini",
+                        f"-jobname={name}",
+                        "-interaction=nonstopmode",
+                        f"-output-directory={self.format_dir}",
+                        "&lualatex",
+                        "mylatexformat.ltx",
+                        self.tex_file,
+                    ],
+                )
+            except JobError as error:
+                with open(failed_file, "w", encoding="UTF-8") as failed:
+                    failed.write(f"{error}\n")
+                scheduler.logger.warning(
+                    "[%s] Unable to dump format, compiling without it: %s",
+                    job["label"],
+                    error,
+                )
+                return
+        if os.path.isfile(format_file):
+            self.format_file = format_file
+
+    def output_path(self, extension: str) -> str:
+        """Return the absolute path of a file written by lualatex.
+
+        Args:
+            extension: extension of the file, like `.aux`
+
+        Returns:
+            Path of the file in the output directory
+        """
+        return os.path.join(
+            self.cwd, self.output_dir, f"{self.jobname}{extension}"
+        )
+
+    def cache_path(self, extension: str) -> str:
+        """Return the path of a file kept in the cache directory.
+
+        Args:
+            extension: extension of the file, like `.aux`
+
+        Returns:
+            Path of the file in the cache directory
+        """
+        return os.path.join(self.cache_dir, self.jobname + extension)
+
+    def aux_hashes(self, hasher: FileHasher) -> dict:
+        """Return the hash of every auxiliary file currently written.
+
+        Args:
+            hasher: object used to hash files
+
+        Returns:
+            Dictionary mapping extension to hash of the file
+        """
+        hasher.cache.clear()
+        return {
+            i_ext: hasher.file(self.output_path(i_ext))
+            for i_ext in self.AUX_EXTENSIONS
+        }
+
+    def recorded_inputs(self) -> list:
+        """Return files read by the last run, as listed in the `.fls` file.
+
+        Only files of the project, i.e. under `cwd`, are returned, files of
+        the TeX distribution are not considered, nor auxiliary files. The tex
+        file itself is always part of the inputs.
+
+        Returns:
+            Sorted list of absolute paths
+        """
+        inputs = {os.path.normpath(os.path.join(self.cwd, self.tex_file))}
+        if not os.path.isfile(self.output_path(".fls")):
+            return sorted(inputs)
+        with open(self.output_path(".fls"), "r", encoding="UTF-8") as fls:
+            for i_line in fls:
+                if not i_line.startswith("INPUT "):
+                    continue
+                path = os.path.normpath(
+                    os.path.join(self.cwd, i_line[len("INPUT ") :].strip())
+                )
+                if (
+                    path.startswith(self.cwd + os.sep)
+                    and os.path.splitext(path)[1] not in self.AUX_EXTENSIONS
+                ):
+                    inputs.add(path)
+        return sorted(inputs)
+
+    def load_state(self) -> dict:
+        """Return the state of the last successful run.
+
+        Returns:
+            Dictionary storing the command and hashes of inputs of the last
+            run, empty if there is none
+        """
+        try:
+            with open(
+                self.cache_path(".json"), "r", encoding="UTF-8"
+            ) as state_file:
+                return json.load(state_file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def state_env(self, env: dict) -> dict:
+        """Return the environment variables changing the PDF produced.
+
+        Args:
+            env: environment of the run, the current environment if None
+
+        Returns:
+            Dictionary mapping each variable of `STATE_ENV` to its value, None
+            if not set
+        """
+        env = os.environ if env is None else env
+        return {i_name: env.get(i_name) for i_name in self.STATE_ENV}
+
+    def is_up_to_date(self, hasher: FileHasher, env: dict) -> bool:
+        """Tell if the PDF of the last successful run can be reused.
+
+        Args:
+            hasher: object used to hash files
+            env: environment of the run, the current environment if None
+
+        Returns:
+            True if the command, the environment variables changing the PDF,
+            like the pinned date of the build, and all recorded inputs are
+            unchanged
+        """
+        state = self.load_state()
+        if (
+            not state
+            or state["command"] != self.command
+            or state.get("env") != self.state_env(env)
+        ):
+            return False
+        if not os.path.isfile(self.cache_path(".pdf")):
+            return False
+        return all(
+            hasher.file(os.path.join(self.cwd, path)) == digest
+            for path, digest in state["inputs"].items()
+        )
+
+    def save_state(self, hasher: FileHasher, env: dict) -> None:
+        """Keep auxiliary files, PDF and inputs hashes of a successful run.
+
+        Args:
+            hasher: object used to hash files
+            env: environment of the run, the current environment if None
+        """
+        for i_ext in self.AUX_EXTENSIONS + [".pdf"]:
+            if os.path.isfile(self.output_path(i_ext)):
+                shutil.copy2(self.output_path(i_ext), self.cache_path(i_ext))
+        state = {
+            "command": self.command,
+            "env": self.state_env(env),
+            "inputs": {
+                os.path.relpath(path, self.cwd): hasher.file(path)
+                for path in self.recorded_inputs()
+            },
+        }
+        with open(
+            self.cache_path(".json"), "w", encoding="UTF-8"
+        ) as state_file:
+            json.dump(state, state_file, indent=2, sort_keys=True)
+
+    def clean_output(self) -> None:
+        """Remove auxiliary files, kept in the cache, from the output.
+
+        Only the PDF is left, so a compiled output does not depend on whether
+        lualatex actually ran. Files of a failed run are left in place to
+        help debugging.
+        """
+        for i_ext in self.OUTPUT_EXTENSIONS:
+            if os.path.isfile(self.output_path(i_ext)):
+                os.remove(self.output_path(i_ext))
+
+    async def run(self, scheduler, job: dict) -> None:
+        """Compile the tex file, called by the scheduler running the job.
+
+        Args:
+            scheduler: `JobScheduler` running the job
+            job: job the compilation belongs to
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        os.makedirs(os.path.join(self.cwd, self.output_dir), exist_ok=True)
+        if self.format_dir:
+            await self.dump_format(scheduler, job)
+        hasher = FileHasher()
+        if self.is_up_to_date(hasher, job["env"]):
+            scheduler.logger.info(
+                "[%s] Inputs unchanged, reusing cached PDF.", job["label"]
+            )
+            shutil.copy2(self.cache_path(".pdf"), self.output_path(".pdf"))
+            self.clean_output()
+            return
+
+        # Start from auxiliary files of the last run, if any, so a single
+        # pass is enough when cross-references did not change.
+        for i_ext in self.AUX_EXTENSIONS:
+            if os.path.isfile(self.cache_path(i_ext)):
+                shutil.copy2(self.cache_path(i_ext), self.output_path(i_ext))
+        for i_pass in range(1, self.MAX_PASSES + 1):
+            previous = self.aux_hashes(hasher)
+            await scheduler.run_command(job, self.command)
+            if self.aux_hashes(hasher) == previous:
+                break
+            scheduler.logger.info(
+                "[%s] Auxiliary files changed after pass %s.",
+                job["label"],
+                i_pass,
+            )
+        else:
+            scheduler.logger.warning(
+                "[%s] Auxiliary files still changing after %s passes.",
+                job["label"],
+                self.MAX_PASSES,
+            )
+        hasher.cache.clear()
+        self.save_state(hasher, job["env"])
+        self.clean_output()
@@ -0,0 +1,412 @@
+"""Build manifest used to only rebuild outputs whose inputs changed.
+
+Each output unit, i.e. a couple (build type, locale), is recorded in a JSON
+manifest together with the content hash of every file it depends on (data
+files, translations, templates, static assets, etc.) and the files it
+produced. The manifest is stored in the cache directory, see `state_dir()`,
+so it is never published with the output. Outputs are hashed once the build
+is done, after the stages modifying them in place, like the compilation of
+PDF or the optimization of html pages. On the next build, a unit whose inputs
+all hash the same and whose outputs all still hash as recorded is skipped.
+"""
+
+# Python Core Library
+# -----------------------------------------------------------------------------
+# https://docs.python.org/3/library/hashlib.html
+# Secure hashes and message digests
+import hashlib
+
+# https://docs.python.org/3/library/json.html
+# JSON encoder and decoder
+import json
+
+# https://docs.python.org/3/library/os.html
+# Miscellaneous operating system interfaces
+import os
+
+
+class FileHasher:
+    """Compute content hashes of files, memoized on their mtime and size."""
+
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, cache: dict = None) -> None:
+        """Initialize FileHasher objects.
+
+        Args:
+            cache: dictionary mapping path to `[mtime_ns, size, sha256]` as
+                   stored in a previous manifest
+        """
+        self.cache = cache if cache is not None else {}
+
+    def file(self, path: str) -> str:
+        """Return the sha256 of the content of a file.
+
+        The hash is only computed when the mtime or the size of the file
+        changed since the last time it was hashed.
+
+        Args:
+            path: path of the file to hash
+
+        Returns:
+            Hexadecimal sha256 of the file or an empty string if the file does
+            not exist
+        """
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self.cache.pop(path, None)
+            return ""
+        cached = self.cache.get(path)
+        if (
+            cached
+            and cached[0] == stat.st_mtime_ns
+            and cached[1] == stat.st_size
+        ):
+            return cached[2]
+        digest = hashlib.sha256()
+        with open(path, "rb") as hashed_file:
+            for chunk in iter(lambda: hashed_file.read(self.CHUNK_SIZE), b""):
+                digest.update(chunk)
+        self.cache[path] = [stat.st_mtime_ns, stat.st_size, digest.hexdigest()]
+        return self.cache[path][2]
+
+    @staticmethod
+    def walk(path: str) -> list:
+        """Return the sorted list of files under a directory.
+
+        Args:
+            path: directory to walk, or a single file
+
+        Returns:
+            List of files path, empty if `path` does not exist
+        """
+        if os.path.isfile(path):
+            return [path]
+        files = []
+        for root, _, filenames in os.walk(path, followlinks=True):
+            files.extend(os.path.join(root, i_file) for i_file in filenames)
+        return sorted(files)
+
+
+def state_dir(cache_dir: str, output_dir: str) -> str:
+    """Return the directory storing the build state of an output directory.
+
+    Each output directory sharing the cache directory gets its own state.
+
+    Args:
+        cache_dir: cache directory of the build
+        output_dir: directory where built files are stored
+
+    Returns:
+        Path of the state directory, in the cache directory
+    """
+    digest = hashlib.sha256(os.path.abspath(output_dir).encode("UTF-8"))
+    return os.path.join(cache_dir, "build", digest.hexdigest()[:16])
+
+
+class BuildManifest:
+    """Record inputs and outputs of every build unit."""
+
+    FILENAME = "manifest.json"
+    VERSION = 2
+
+    def __init__(self, directory: str, output_dir: str, basedir: str) -> None:
+        """Initialize BuildManifest objects.
+
+        Args:
+            directory: directory where the manifest is stored
+            output_dir: directory where built files are stored
+            basedir: root of the repository, recorded paths are relative to it
+        """
+        self.path = os.path.join(directory, self.FILENAME)
+        self.output_dir = output_dir
+        self.basedir = basedir
+        self.units = {}
+        self.hasher = FileHasher()
+
+    @staticmethod
+    def unit_key(build_type: str, curr_locale: str) -> str:
+        """Return the key identifying a build unit in the manifest.
+
+        Args:
+            build_type: string defining the build (html, pdf, tex)
+            curr_locale: locale used for the build (like en_US)
+
+        Returns:
+            Key of the unit, like `html/en_US`
+        """
+        return f"{build_type}/{curr_locale}"
+
+    def load(self) -> None:
+        """Load the manifest if any."""
+        self.units = {}
+        self.hasher = FileHasher()
+        if not os.path.isfile(self.path):
+            return
+        with open(self.path, "r", encoding="UTF-8") as manifest_file:
+            try:
+                content = json.load(manifest_file)
+            except json.JSONDecodeError:
+                return
+        if content.get("version") != self.VERSION:
+            return
+        self.units = content.get("units", {})
+        self.hasher = FileHasher(
+            {
+                os.path.join(self.basedir, path): value
+                for path, value in content.get("files", {}).items()
+            }
+        )
+
+    def save(self) -> None:
+        """Hash outputs of the units built and write the manifest.
+
+        Outputs which were not produced, like PDF of a failed job, are
+        recorded without hash so their unit is built again.
+        """
+        for i_unit in self.units.values():
+            for path, digest in i_unit["outputs"].items():
+                output = os.path.join(self.output_dir, path)
+                if digest is None and os.path.isfile(output):
+                    i_unit["outputs"][path] = self.hasher.file(output)
+        content = {
+            "version": self.VERSION,
+            "units": self.units,
+            "files": {
+                os.path.relpath(path, self.basedir): value
+                for path, value in sorted(self.hasher.cache.items())
+            },
+        }
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "w", encoding="UTF-8") as manifest_file:
+            json.dump(content, manifest_file, indent=2, sort_keys=True)
+
+    def hash_inputs(self, inputs: list) -> dict:
+        """Hash every file of the inputs.
+
+        Args:
+            inputs: list of files or directories the unit depends on
+
+        Returns:
+            Dictionary mapping each file, relative to basedir, to its hash
+        """
+        hashes = {}
+        for i_input in inputs:
+            for i_file in self.hasher.walk(i_input):
+                hashes[os.path.relpath(i_file, self.basedir)] = (
+                    self.hasher.file(i_file)
+                )
+        return hashes
+
+    def is_up_to_date(
+        self, build_type: str, curr_locale: str, inputs: list, context: dict
+    ) -> bool:
+        """Tell if a unit can be skipped.
+
+        A unit is up to date if it was recorded with the same context, if all
+        its current inputs were already known, if every recorded input (which
+        include templates discovered while rendering) still hash the same and
+        if every recorded output still hashes as when it was produced.
+
+        Args:
+            build_type: string defining the build (html, pdf, tex)
+            curr_locale: locale used for the build (like en_US)
+            inputs: list of files or directories the unit depends on
+            context: extra values which affect the output, like build date
+
+        Returns:
+            True if the unit does not need to be rebuilt
+        """
+        unit = self.units.get(self.unit_key(build_type, curr_locale))
+        if not unit or unit["context"] != context:
+            return False
+        if not set(self.hash_inputs(inputs)).issubset(unit["inputs"]):
+            return False
+        for path, digest in unit["inputs"].items():
+            if self.hasher.file(os.path.join(self.basedir, path)) != digest:
+                return False
+        for path, digest in unit["outputs"].items():
+            output = os.path.join(self.output_dir, path)
+            if not os.path.isfile(output):
+                return False
+            if self.hasher.file(output) != digest:
+                return False
+        return True
+
+    # pylint: disable=R0913
+    def record(
+        self,
+        build_type: str,
+        curr_locale: str,
+        inputs: list,
+        context: dict,
+        outputs: list,
+    ) -> None:
+        """Record inputs and outputs of a freshly built unit.
+
+        Args:
+            build_type: string defining the build (html, pdf, tex)
+            curr_locale: locale used for the build (like en_US)
+            inputs: list of files or directories the unit depends on
+            context: extra values which affect the output, like build date
+            outputs: list of files produced by the unit
+        """
+        self.units[self.unit_key(build_type, curr_locale)] = {
+            "context": context,
+            "inputs": self.hash_inputs(inputs),
+            # Hashed by `save()` once every stage of the build is done
+            "outputs": {
+                os.path.relpath(path, self.output_dir): None
+                for path in sorted(outputs)
+            },
+        }
+
+    def merge(
+        self, build_type: str, curr_locale: str, unit: dict, files: dict
+    ) -> None:
+        """Merge the record of a unit built by another process.
+
+        Args:
+            build_type: string defining the build (html, pdf, tex)
+            curr_locale: locale used for the build (like en_US)
+            unit: record of the unit as stored in `units`, None if not built
+            files: files hashes known by the other process
+        """
+        key = self.unit_key(build_type, curr_locale)
+        if unit:
+            self.units[key] = unit
+        else:
+            self.units.pop(key, None)
+        self.hasher.cache.update(files)
+
+    def built_outputs(self, build_type: str) -> list:
+        """Return outputs of the units of a build type built by this build.
+
+        Outputs are only hashed by `save()`, outputs recorded without hash
+        were thus produced by this build.
+
+        Args:
+            build_type: string defining the build (html, pdf, tex)
+
+        Returns:
+            Sorted list of outputs path
+        """
+        return sorted(
+            os.path.join(self.output_dir, path)
+            for key, unit in self.units.items()
+            if key.startswith(f"{build_type}/")
+            for path, digest in unit["outputs"].items()
+            if digest is None
+        )
+
+    def update_outputs(self, changed: dict) -> None:
+        """Record outputs modified or renamed since they were recorded.
+
+        Their hash is computed again by `save()`.
+
+        Args:
+            changed: dictionary mapping the path of each output modified by
+                     a later stage of the build, like the fingerprinting of
+                     html assets, to its current path
+        """
+        changed = {
+            os.path.relpath(path, self.output_dir): os.path.relpath(
+                current, self.output_dir
+            )
+            for path, current in changed.items()
+        }
+        for i_unit in self.units.values():
+            i_unit["outputs"] = {
+                changed.get(path, path): None if path in changed else digest
+                for path, digest in i_unit["outputs"].items()
+            }
+
+    def forget(self, build_type: str, curr_locale: str) -> None:
+        """Remove a unit from the manifest, forcing its next rebuild.
+
+        Args:
+            build_type: string defining the build (html, pdf, tex)
+            curr_locale: locale used for the build (like en_US)
+        """
+        self.units.pop(self.unit_key(build_type, curr_locale), None)
+
+
+class OutputChanges:
+    """List files of the output whose content changed since the last build.
+
+    Content hashes of every output file are stored in `changes.json`, next
+    to the build manifest, together with the files changed, i.e.
+    created or whose content differs, and deleted by the last build, so
+    deploy tools only upload what actually differs.
+    """
+
+    FILENAME = "changes.json"
+    VERSION = 1
+
+    def __init__(self, directory: str, output_dir: str) -> None:
+        """Initialize OutputChanges objects.
+
+        Args:
+            directory: directory where the list is stored
+            output_dir: directory where built files are stored
+        """
+        self.path = os.path.join(directory, self.FILENAME)
+        self.output_dir = output_dir
+        self.hasher = FileHasher()
+        self.previous = {}
+
+    def load(self) -> None:
+        """Load hashes of the output files of the previous build.
+
+        Must be called before the output directory is cleaned.
+        """
+        self.previous = {}
+        self.hasher = FileHasher()
+        try:
+            with open(self.path, "r", encoding="UTF-8") as changes_file:
+                content = json.load(changes_file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        if content.get("version") != self.VERSION:
+            return
+        files = content.get("files", {})
+        self.previous = {path: value[2] for path, value in files.items()}
+        self.hasher = FileHasher(
+            {
+                os.path.join(self.output_dir, path): value
+                for path, value in files.items()
+            }
+        )
+
+    def save(self) -> tuple:
+        """Hash the output files and write the list of changes.
+
+        Returns:
+            Tuple `(changed, deleted)` of lists of paths relative to the
+            output directory
+        """
+        current = {}
+        for i_file in self.hasher.walk(self.output_dir):
+            path = os.path.relpath(i_file, self.output_dir)
+            current[path] = self.hasher.file(i_file)
+        changed = sorted(
+            path
+            for path, digest in current.items()
+            if self.previous.get(path) != digest
+        )
+        deleted = sorted(set(self.previous) - set(current))
+        content = {
+            "version": self.VERSION,
+            "changed": changed,
+            "deleted": deleted,
+            "files": {
+                path: self.hasher.cache[os.path.join(self.output_dir, path)]
+                for path in sorted(current)
+            },
+        }
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "w", encoding="UTF-8") as changes_file:
+            json.dump(content, changes_file, indent=2, sort_keys=True)
+        self.previous = current
+        return changed, deleted
@@ -0,0 +1,136 @@
+"""Memoized conversion of markdown descriptions into html.
+
+Descriptions are converted for every locale, and the same description is
+often reused by several entries through YAML anchors. A single `Markdown`
+instance, with its extensions loaded once, is reset between conversions and
+results are kept in a LRU cache keyed by the source text and extensions. When
+a cache directory is given, results are also stored on disk, one file per
+conversion, so later builds, and every process of a parallel build, reuse
+them. Markdown itself is only imported once a description is converted.
+"""
+
+# Python Core Library
+# -----------------------------------------------------------------------------
+# https://docs.python.org/3/library/collections.html
+# Container datatypes
+import collections
+
+# https://docs.python.org/3/library/hashlib.html
+# Secure hashes and message digests
+import hashlib
+
+# https://docs.python.org/3/library/os.html
+# Miscellaneous operating system interfaces
+import os
+
+
+class MarkdownRenderer:
+    """Convert markdown into html with a reused and memoized engine."""
+
+    def __init__(
+        self, extensions: list, cache_dir: str = None, maxsize: int = 1024
+    ) -> None:
+        """Initialize MarkdownRenderer objects.
+
+        Args:
+            extensions: list of markdown extensions to load
+            cache_dir: directory where conversions are stored, conversions
+                       are only kept in memory if None
+            maxsize: maximum number of conversions kept in memory
+        """
+        self.extensions = list(extensions)
+        self.cache_dir = cache_dir
+        self.maxsize = maxsize
+        self.cache = collections.OrderedDict()
+        self.engine = None
+        self.patterns = set()
+
+    def __getstate__(self) -> dict:
+        """Return the state to pickle, without the markdown engine.
+
+        Returns:
+            Attributes of the object, the engine being created again when
+            first used by another process
+        """
+        state = dict(self.__dict__)
+        state["engine"] = None
+        return state
+
+    def key(self, source: str) -> str:
+        """Return the cache key of a conversion.
+
+        Args:
+            source: markdown text to convert
+
+        Returns:
+            Hash of the markdown version, extensions and source
+        """
+        # pylint: disable=C0415
+        import markdown
+
+        digest = hashlib.sha256()
+        digest.update(markdown.__version__.encode("UTF-8"))
+        for i_extension in self.extensions:
+            digest.update(f"\0{i_extension}".encode("UTF-8"))
+        digest.update(f"\0\0{source}".encode("UTF-8"))
+        return digest.hexdigest()
+
+    def render(self, source: str) -> str:
+        """Convert markdown into html with the reused engine.
+
+        Args:
+            source: markdown text to convert
+
+        Returns:
+            Html converted from the markdown text
+        """
+        if self.engine is None:
+            # pylint: disable=C0415
+            import markdown
+
+            self.engine = markdown.Markdown(extensions=self.extensions)
+            # pylint: disable=W0212
+            self.patterns = set(self.engine.inlinePatterns._data)
+        try:
+            return self.engine.convert(source)
+        finally:
+            self.engine.reset()
+            # Some extensions, like `abbr`, register inline patterns while
+            # converting and do not remove them on reset
+            # pylint: disable=W0212
+            for i_pattern in set(self.engine.inlinePatterns._data):
+                if i_pattern not in self.patterns:
+                    self.engine.inlinePatterns.deregister(i_pattern)
+
+    def convert(self, source: str) -> str:
+        """Convert markdown into html, reusing previous conversions.
+
+        Args:
+            source: markdown text to convert
+
+        Returns:
+            Html converted from the markdown text
+        """
+        key = self.key(source)
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        path = None
+        if self.cache_dir:
+            path = os.path.join(self.cache_dir, key[:2], f"{key[2:]}.html")
+        if path and os.path.isfile(path):
+            with open(path, "r", encoding="UTF-8") as cache_file:
+                html = cache_file.read()
+        else:
+            html = self.render(source)
+            if path:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(
+                    f"{path}.{os.getpid()}", "w", encoding="UTF-8"
+                ) as cache_file:
+                    cache_file.write(html)
+                os.replace(f"{path}.{os.getpid()}", path)
+        self.cache[key] = html
+        if len(self.cache) > self.maxsize:
+            self.cache.popitem(last=False)
+        return html
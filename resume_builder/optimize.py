@@ -0,0 +1,504 @@
+"""Post-render optimisation of the html output.
+
+Once every page is rendered, this module:
+
+- purges selectors of the CSS libraries, i.e. Bootstrap and Font Awesome,
+  referring to classes, ids or tags found neither in the pages nor in the
+  scripts,
+- inlines, in the `<head>` of each page, the rules matching the content shown
+  before the first section of the page, i.e. above the fold, and loads the
+  complete stylesheets without blocking the first paint,
+- minifies the html pages and every stylesheet.
+
+Selectors are matched on the words used by pages and scripts, not on the
+actual document tree, so the purge is conservative: a selector is only
+removed when one of its classes, ids or tags is never written anywhere.
+
+Pages skipped by an incremental build are already optimized, so only pages
+rendered by the build are, unless a stylesheet they inline rules of was
+rendered again. Words of every page are still read to purge the libraries,
+without the markup added by their optimization, so the purged libraries do
+not depend on which pages were rendered.
+"""
+
+# Python Core Library
+# -----------------------------------------------------------------------------
+# https://docs.python.org/3/library/logging.html
+# Logging facility for Python
+import logging
+
+# https://docs.python.org/3/library/os.html
+# Miscellaneous operating system interfaces
+import os
+
+# https://docs.python.org/3/library/posixpath.html
+# Common pathname manipulations, used for URLs
+import posixpath
+
+# https://docs.python.org/3/library/re.html
+# Regular expression operations
+import re
+
+# Local Library
+# -----------------------------------------------------------------------------
+# Replace files of the output without modifying stored assets
+from resume_builder.assets import (
+    FINGERPRINT_REGEXP,
+    published_file,
+    write_file,
+)
+
+CSS_TOKEN_REGEXP = re.compile(
+    r"(\"(?:\\.|[^\"\\])*\"|'(?:\\.|[^'\\])*')|(/\*.*?\*/)|(\s+)", re.DOTALL
+)
+CSS_URL_REGEXP = re.compile(r"url\(\s*(['\"]?)([^'\")]+)\1\s*\)")
+HTML_COMMENT_REGEXP = re.compile(r"<!--(?!\[if).*?-->", re.DOTALL)
+HTML_RAW_REGEXP = re.compile(
+    r"(<(pre|textarea|script|style)\b.*?</\2\s*>)", re.DOTALL | re.IGNORECASE
+)
+HTML_TAG_REGEXP = re.compile(r"<[^>]+>")
+STYLESHEET_REGEXP = re.compile(r"<link\b[^>]*\brel=\"stylesheet\"[^>]*>")
+HREF_REGEXP = re.compile(r"\bhref=\"([^\"]+)\"")
+CRITICAL_REGEXP = re.compile(r"<style data-critical>.*?</style>", re.DOTALL)
+NOSCRIPT_REGEXP = re.compile(r"<noscript>(?:<link\b[^>]*>)+</noscript>")
+# Attributes loading a stylesheet without blocking the first paint
+DEFERRED_ATTRIBUTES = ' media="print" onload="this.media=\'all\'"'
+WORD_REGEXP = re.compile(r"[\w-]+")
+# At-rules whose content are rules which can be filtered
+GROUP_AT_RULES = ("@media", "@supports", "@document", "@-moz-document")
+
+
+def minify_css(css: str) -> str:
+    """Remove comments and unneeded whitespaces from a stylesheet.
+
+    Args:
+        css: content of the stylesheet
+
+    Returns:
+        Minified stylesheet
+    """
+    chunks = []
+    for i_match in re.finditer(
+        r"([^\"'/\s]+|/(?!\*))|" + CSS_TOKEN_REGEXP.pattern, css, re.DOTALL
+    ):
+        code, string, _, space = i_match.groups()
+        if code:
+            chunks.append(code)
+        elif string:
+            chunks.append(string)
+        elif space and chunks and chunks[-1] != " ":
+            chunks.append(" ")
+    minified = []
+    # Tell, for each open block, if it contains declarations rather than
+    # rules, as a space before `:` is only meaningful in selectors, like in
+    # `a :hover`
+    blocks = []
+    prelude = ""
+    for i_chunk in chunks:
+        if i_chunk == " " and minified and minified[-1][-1] in "{};,>:":
+            continue
+        if (
+            minified
+            and minified[-1] == " "
+            and (
+                i_chunk[0] in "{};,>"
+                or (i_chunk[0] == ":" and blocks[-1:] == [True])
+            )
+        ):
+            minified.pop()
+        minified.append(i_chunk)
+        for i_char in i_chunk if i_chunk[0] not in "\"'" else "":
+            if i_char == "{":
+                blocks.append(not prelude.strip().startswith(GROUP_AT_RULES))
+                prelude = ""
+            elif i_char == "}":
+                blocks = blocks[:-1]
+                prelude = ""
+            elif i_char == ";":
+                prelude = ""
+            else:
+                prelude += i_char
+    return "".join(minified).replace(";}", "}").strip()
+
+
+def minify_html(content: str) -> str:
+    """Remove comments and collapse whitespaces of an html page.
+
+    Content of `pre`, `textarea`, `script` and `style` elements is kept as is
+    and a whitespace is never fully removed, only collapsed, so the page
+    renders the same.
+
+    Args:
+        content: content of the html page
+
+    Returns:
+        Minified html page
+    """
+    content = HTML_COMMENT_REGEXP.sub("", content)
+    minified = []
+    for i_index, i_part in enumerate(HTML_RAW_REGEXP.split(content)):
+        # Split returns the text, the raw element then its tag name
+        if i_index % 3 == 1:
+            minified.append(i_part)
+        elif i_index % 3 == 0:
+            minified.append(
+                re.sub(
+                    r"\s+",
+                    lambda space: "\n" if "\n" in space.group(0) else " ",
+                    i_part,
+                )
+            )
+    return "".join(minified).strip() + "\n"
+
+
+def strip_critical_css(content: str) -> str:
+    """Remove the markup added by `HtmlOptimizer.inline_critical_css()`.
+
+    Args:
+        content: content of an html page, optimized or not
+
+    Returns:
+        Content of the html page as rendered, whitespaces and comments apart
+    """
+    content = CRITICAL_REGEXP.sub("", content)
+    content = NOSCRIPT_REGEXP.sub("", content)
+    return content.replace(DEFERRED_ATTRIBUTES, "")
+
+
+def output_files(output_dir: str, extensions: tuple) -> list:
+    """Return files of an html output directory with given extensions.
+
+    Args:
+        output_dir: html output directory
+        extensions: tuple of extensions, like `(".html", ".js")`
+
+    Returns:
+        Sorted list of files path, assets are not included
+    """
+    files = []
+    for root, dirs, filenames in os.walk(output_dir):
+        dirs[:] = [i_dir for i_dir in dirs if i_dir != "assets"]
+        files.extend(
+            os.path.join(root, i_file)
+            for i_file in filenames
+            if i_file.endswith(extensions)
+        )
+    return sorted(files)
+
+
+def split_blocks(css: str) -> list:
+    """Split a stylesheet in its top level statements and blocks.
+
+    Args:
+        css: content of the stylesheet, without comments
+
+    Returns:
+        List of tuples `(prelude, body)`, `body` being None for statements
+        like `@charset "UTF-8";`
+    """
+    blocks = []
+    start = brace = depth = 0
+    index = 0
+    while index < len(css):
+        char = css[index]
+        if char in "\"'":
+            index = css.index(char, index + 1)
+            while css[index - 1] == "\\":
+                index = css.index(char, index + 1)
+        elif char == "{":
+            if depth == 0:
+                brace = index
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                blocks.append(
+                    (css[start:brace].strip(), css[brace + 1 : index])
+                )
+                start = index + 1
+        elif char == ";" and depth == 0:
+            blocks.append((css[start : index + 1].strip(), None))
+            start = index + 1
+        index += 1
+    return blocks
+
+
+def split_selectors(prelude: str) -> list:
+    """Split a selectors list on commas which are not within parentheses.
+
+    Args:
+        prelude: selectors list, like `.a, .b:not(.c, .d)`
+
+    Returns:
+        List of selectors
+    """
+    selectors = []
+    start = depth = 0
+    for index, char in enumerate(prelude):
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            selectors.append(prelude[start:index].strip())
+            start = index + 1
+    selectors.append(prelude[start:].strip())
+    return selectors
+
+
+def selector_words(selector: str) -> set:
+    """Return classes, ids and tags a selector requires to match.
+
+    Attribute selectors, pseudo-classes and pseudo-elements are ignored.
+
+    Args:
+        selector: a single selector, like `.navbar > a:hover`
+
+    Returns:
+        Set of words, without the `.` and `#` prefixes
+    """
+    selector = re.sub(r"\[[^\]]*\]", "", selector)
+    selector = re.sub(r"::?[\w-]+(\((?:[^()]|\([^()]*\))*\))?", "", selector)
+    words = set(re.findall(r"[.#]([\w-]+)", selector))
+    words.update(re.findall(r"(?:^|[\s>+~])([a-zA-Z][\w-]*)", selector))
+    return words
+
+
+def filter_css(css: str, words: set, critical: bool = False) -> str:
+    """Only keep rules of a stylesheet whose selectors may match.
+
+    Args:
+        css: content of the stylesheet
+        words: classes, ids and tags which may be found in the document
+        critical: tell if the result is inlined as critical CSS, in which case
+                  statements and at-rules other than `@font-face` are dropped
+
+    Returns:
+        Filtered stylesheet
+    """
+    css = CSS_TOKEN_REGEXP.sub(
+        lambda token: "" if token.group(2) else token.group(0), css
+    )
+    rules = []
+    for prelude, body in split_blocks(css):
+        if body is None:
+            if not critical:
+                rules.append(prelude)
+        elif prelude.startswith(GROUP_AT_RULES):
+            body = filter_css(body, words, critical)
+            if body.strip():
+                rules.append(f"{prelude} {{\n{body}}}")
+        elif prelude.startswith("@"):
+            if not critical or prelude.startswith("@font-face"):
+                rules.append(f"{prelude} {{{body}}}")
+        else:
+            selectors = [
+                i_selector
+                for i_selector in split_selectors(prelude)
+                if selector_words(i_selector).issubset(words)
+            ]
+            if selectors:
+                rules.append(f"{', '.join(selectors)} {{{body}}}")
+    return "".join(f"{i_rule}\n" for i_rule in rules)
+
+
+def rebase_urls(css: str, css_dir: str, page_dir: str) -> str:
+    """Make relative URLs of a stylesheet relative to another directory.
+
+    Args:
+        css: content of the stylesheet
+        css_dir: directory of the stylesheet
+        page_dir: directory from which URLs are resolved once rebased
+
+    Returns:
+        Stylesheet with rebased URLs
+    """
+
+    def rebase(match: re.Match) -> str:
+        url = match.group(2)
+        if re.match(r"^(?:[a-z]+:|/|#)", url):
+            return match.group(0)
+        url = posixpath.relpath(
+            posixpath.normpath(posixpath.join(css_dir, url)), page_dir
+        )
+        return f"url('{url}')"
+
+    return CSS_URL_REGEXP.sub(rebase, css)
+
+
+class HtmlOptimizer:
+    """Purge, inline critical CSS and minify an html output directory."""
+
+    # Content shown before the first section of a page is above the fold
+    FOLD_REGEXP = re.compile(r"<div\b[^>]*\bclass=\"[^\"]*\bsection-holder\b")
+    # Stylesheets whose unused selectors are purged
+    PURGED_CSS = ["lib"]
+
+    def __init__(self, output_dir: str, logger: logging.Logger) -> None:
+        """Initialize HtmlOptimizer objects.
+
+        Args:
+            output_dir: html output directory to optimize
+            logger: logger used to report the optimisation
+        """
+        self.output_dir = output_dir
+        self.logger = logger
+
+    def output_files(self, extension: str) -> list:
+        """Return pages, scripts or stylesheets of the output directory.
+
+        Files published under their fingerprinted name by a previous build
+        are final, so they are not returned.
+
+        Args:
+            extension: extension of the files, like `.html`
+
+        Returns:
+            Sorted list of files path
+        """
+        return [
+            i_file
+            for i_file in output_files(self.output_dir, (extension,))
+            if not FINGERPRINT_REGEXP.search(i_file)
+        ]
+
+    @staticmethod
+    def read(path: str) -> str:
+        """Return the content of a file.
+
+        Args:
+            path: path of the file
+
+        Returns:
+            Content of the file
+        """
+        with open(path, "r", encoding="UTF-8") as read_file:
+            return read_file.read()
+
+    @staticmethod
+    def write(path: str, content: str) -> bool:
+        """Replace the content of a file.
+
+        Args:
+            path: path of the file
+            content: content to write
+
+        Returns:
+            True if the file was written, False if it already had this content
+        """
+        return write_file(path, content)
+
+    @staticmethod
+    def tag_words(content: str) -> set:
+        """Return words used within the tags of an html document.
+
+        Args:
+            content: html document or part of it
+
+        Returns:
+            Set of words, which include tag names, classes and ids, comments
+            are ignored
+        """
+        words = set()
+        content = HTML_COMMENT_REGEXP.sub("", content)
+        for i_tag in HTML_TAG_REGEXP.findall(content):
+            words.update(WORD_REGEXP.findall(i_tag))
+        return words
+
+    def purge(self, pages: dict) -> None:
+        """Remove unused selectors from the CSS libraries.
+
+        Args:
+            pages: dictionary mapping every html page path to its content
+        """
+        words = set()
+        for i_content in pages.values():
+            words.update(self.tag_words(strip_critical_css(i_content)))
+        for i_script in self.output_files(".js"):
+            words.update(WORD_REGEXP.findall(self.read(i_script)))
+        purged = tuple(
+            os.path.join(self.output_dir, "css", i_dir, "")
+            for i_dir in self.PURGED_CSS
+        )
+        for i_css in self.output_files(".css"):
+            if i_css.startswith(purged):
+                self.write(i_css, filter_css(self.read(i_css), words))
+
+    def inline_critical_css(self, path: str, content: str) -> str:
+        """Inline rules matching the content above the fold of a page.
+
+        Stylesheets are then loaded without blocking the rendering, a
+        `noscript` fallback loading them for browsers without javascript.
+        When the page already inlines critical CSS, only its rules are
+        updated.
+
+        Args:
+            path: path of the html page
+            content: content of the html page
+
+        Returns:
+            Content of the html page with critical CSS inlined
+        """
+        page_dir = os.path.dirname(path)
+        fold = self.FOLD_REGEXP.search(content)
+        words = self.tag_words(
+            strip_critical_css(content[: fold.start() if fold else None])
+        )
+        links = STYLESHEET_REGEXP.findall(content)
+        hrefs = [HREF_REGEXP.search(i_link).group(1) for i_link in links]
+        critical = []
+        for i_href in dict.fromkeys(hrefs):
+            # Rendered stylesheets skipped by an incremental build are only
+            # published under their fingerprinted name
+            css_file = published_file(
+                FINGERPRINT_REGEXP.sub(
+                    "", os.path.normpath(os.path.join(page_dir, i_href))
+                )
+            )
+            if not css_file:
+                continue
+            critical.append(
+                rebase_urls(
+                    filter_css(self.read(css_file), words, critical=True),
+                    posixpath.dirname(i_href),
+                    ".",
+                )
+            )
+        style = f"<style data-critical>{minify_css(''.join(critical))}</style>"
+        if CRITICAL_REGEXP.search(content):
+            return CRITICAL_REGEXP.sub(lambda _: style, content, count=1)
+        if not links:
+            return content
+        first = content.index(links[0])
+        noscript = "<noscript>" + "".join(links) + "</noscript>"
+        content = STYLESHEET_REGEXP.sub(
+            lambda link: link.group(0).replace(
+                'rel="stylesheet"', f'rel="stylesheet"{DEFERRED_ATTRIBUTES}'
+            ),
+            content,
+        )
+        return content[:first] + style + noscript + content[first:]
+
+    def run(self, rendered: list = None) -> list:
+        """Optimize pages and every stylesheet of the output directory.
+
+        Args:
+            rendered: html pages rendered by the build, other pages being
+                      already optimized, every page is optimized if None
+
+        Returns:
+            List of the pages written
+        """
+        self.logger.info("Optimizing html pages and stylesheets.")
+        pages = {
+            i_page: self.read(i_page) for i_page in self.output_files(".html")
+        }
+        self.purge(pages)
+        written = []
+        for i_page in pages if rendered is None else rendered:
+            i_content = self.inline_critical_css(i_page, pages[i_page])
+            if self.write(i_page, minify_html(i_content)):
+                written.append(i_page)
+        for i_css in self.output_files(".css"):
+            self.write(i_css, minify_css(self.read(i_css)))
+        return written
@@ -0,0 +1,198 @@
+"""Timing spans of the build stages.
+
+Stages of the build, like the rendering of a template or a lualatex run, are
+wrapped in spans recording their start, duration and tags, such as the
+locale and the build type. Spans recorded by the worker processes of a
+parallel build are sent back to the main process, which can then print a
+summary of the time spent per stage or write every span as a Chrome trace,
+to be opened with `chrome://tracing` or https://ui.perfetto.dev.
+
+Spans are only recorded when profiling is enabled, otherwise `span()`
+returns a context manager doing nothing.
+"""
+
+# Python Core Library
+# -----------------------------------------------------------------------------
+# https://docs.python.org/3/library/collections.html
+# Container datatypes
+import collections
+
+# https://docs.python.org/3/library/contextlib.html
+# Utilities for with-statement contexts
+import contextlib
+
+# https://docs.python.org/3/library/json.html
+# JSON encoder and decoder
+import json
+
+# https://docs.python.org/3/library/os.html
+# Miscellaneous operating system interfaces
+import os
+
+# https://docs.python.org/3/library/threading.html
+# Thread-based parallelism
+import threading
+
+# https://docs.python.org/3/library/time.html
+# Time access and conversions
+import time
+
+
+class Profiler:
+    """Record timing spans of the build stages."""
+
+    def __init__(self, enabled: bool = False) -> None:
+        """Initialize Profiler objects.
+
+        Args:
+            enabled: tell if spans are recorded
+        """
+        self.enabled = enabled
+        self.spans = []
+        self.lanes = {}
+
+    def span(self, name: str, lane: str = None, **tags):
+        """Return a context manager recording a span around its block.
+
+        Args:
+            name: name of the stage, like `render`
+            lane: name of the trace row showing the span, like the label of a
+                  lualatex job, the current thread if None
+            tags: values describing the span, like `locale` or `build_type`
+
+        Returns:
+            Context manager
+        """
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return self.record(name, lane, tags)
+
+    @contextlib.contextmanager
+    def record(self, name: str, lane: str, tags: dict):
+        """Record a span around a block.
+
+        Monotonic time is used as it is shared by every process of the host,
+        so spans of worker processes line up with the ones of the main
+        process.
+
+        Args:
+            name: name of the stage
+            lane: name of the trace row showing the span
+            tags: values describing the span
+        """
+        start = time.monotonic_ns()
+        try:
+            yield
+        finally:
+            self.spans.append(
+                {
+                    "name": name,
+                    "start": start,
+                    "duration": time.monotonic_ns() - start,
+                    "pid": os.getpid(),
+                    "tid": self.lane(lane) if lane else threading.get_ident(),
+                    "tags": {key: str(value) for key, value in tags.items()},
+                }
+            )
+
+    def lane(self, name: str) -> int:
+        """Return the trace row identifier of a lane.
+
+        Args:
+            name: name of the lane
+
+        Returns:
+            Identifier of the row, shared by every span of the lane
+        """
+        if name not in self.lanes:
+            self.lanes[name] = len(self.lanes) + 1
+        return self.lanes[name]
+
+    def mark(self) -> int:
+        """Return a marker of the spans recorded so far.
+
+        Returns:
+            Marker to give to `spans_since()`
+        """
+        return len(self.spans)
+
+    def spans_since(self, marker: int) -> list:
+        """Return spans recorded since a marker.
+
+        Used to send spans recorded by a worker process to the main one.
+
+        Args:
+            marker: value returned by `mark()`
+
+        Returns:
+            List of spans
+        """
+        return self.spans[marker:]
+
+    def merge(self, spans: list) -> None:
+        """Add spans recorded by another process.
+
+        Args:
+            spans: list of spans as returned by `spans_since()`
+        """
+        self.spans.extend(spans)
+
+    def summary(self) -> str:
+        """Return a table of the time spent per stage.
+
+        Spans may be nested, like `render` spans within `unit` spans, the
+        duration of a span is then also counted in the one of its parent.
+
+        Returns:
+            Table with the number of spans, the total, mean and maximum
+            duration of each stage, sorted by total duration
+        """
+        durations = collections.defaultdict(list)
+        for i_span in self.spans:
+            durations[i_span["name"]].append(i_span["duration"] / 1e9)
+        lines = [
+            f"{'Stage':<20} {'Count':>7} {'Total (s)':>11} "
+            + f"{'Mean (s)':>10} {'Max (s)':>10}"
+        ]
+        for name, values in sorted(
+            durations.items(), key=lambda item: sum(item[1]), reverse=True
+        ):
+            lines.append(
+                f"{name:<20} {len(values):>7} {sum(values):>11.3f} "
+                + f"{sum(values) / len(values):>10.3f} {max(values):>10.3f}"
+            )
+        return "\n".join(lines)
+
+    def write_trace(self, path: str) -> None:
+        """Write spans as a Chrome trace event file.
+
+        Args:
+            path: path of the JSON file to write
+        """
+        origin = min((i["start"] for i in self.spans), default=0)
+        events = [
+            {
+                "name": i_span["name"],
+                "cat": i_span["tags"].get("build_type", "build"),
+                "ph": "X",
+                "ts": (i_span["start"] - origin) / 1000,
+                "dur": i_span["duration"] / 1000,
+                "pid": i_span["pid"],
+                "tid": i_span["tid"],
+                "args": i_span["tags"],
+            }
+            for i_span in self.spans
+        ]
+        # Lanes are only used by the process writing the trace
+        events.extend(
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": os.getpid(),
+                "tid": tid,
+                "args": {"name": name},
+            }
+            for name, tid in self.lanes.items()
+        )
+        with open(path, "w", encoding="UTF-8") as trace_file:
+            json.dump({"traceEvents": events}, trace_file)
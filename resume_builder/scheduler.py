@@ -0,0 +1,358 @@
+"""Asynchronous scheduler running external tools such as lualatex and gs.
+
+Jobs are chains of commands which must run one after the other, like the
+compilation of a PDF with lualatex followed by its conversion in black & white
+with Ghostscript. Chains of every locale run concurrently as subprocesses,
+within a concurrency limit and a timeout per command. Output of the commands
+is streamed to the logger and the first failing job cancels all the others.
+Jobs describing the inputs of their outputs are looked up in the artifact
+cache first, their commands are then only run on a miss and their outputs
+published once done. asyncio is only imported once jobs are run.
+"""
+
+from __future__ import annotations
+
+# Python Core Library
+# -----------------------------------------------------------------------------
+# https://docs.python.org/3/library/collections.html
+# Container datatypes
+import collections
+
+# https://docs.python.org/3/library/logging.html
+# Logging facility for Python
+import logging
+
+# https://docs.python.org/3/library/os.html
+# Miscellaneous operating system interfaces
+import os
+import shutil
+
+# https://docs.python.org/3/library/typing.html
+# Support for type hints
+from typing import TYPE_CHECKING
+
+# Local Library
+# -----------------------------------------------------------------------------
+# Record timing spans of the build stages
+from resume_builder.profiling import Profiler
+
+if TYPE_CHECKING:
+    # https://docs.python.org/3/library/asyncio.html
+    # Asynchronous I/O
+    import asyncio
+    from asyncio.subprocess import Process
+
+    from resume_builder.artifacts import ArtifactCache
+
+
+class JobError(Exception):
+    """Exception raised when a command of a job fails or times out."""
+
+    def __init__(self, label: str, message: str, output: list = None) -> None:
+        """Initialize JobError objects.
+
+        Args:
+            label: label of the failing job, like `en_US/resume.tex`
+            message: description of the failure
+            output: last lines output by the failing command
+        """
+        super().__init__(f"{label}: {message}")
+        self.label = label
+        self.output = output or []
+
+
+# pylint: disable=R0902
+class JobScheduler:
+    """Run chains of external commands concurrently."""
+
+    OUTPUT_TAIL = 30
+
+    # pylint: disable=R0913
+    def __init__(
+        self,
+        logger: logging.Logger,
+        concurrency: int = None,
+        timeout: float = None,
+        quiet: bool = False,
+        profiler: Profiler = None,
+        artifacts: ArtifactCache = None,
+    ) -> None:
+        """Initialize JobScheduler objects.
+
+        Args:
+            logger: logger to which output of commands is streamed
+            concurrency: maximum number of commands running at the same time,
+                         default to the number of CPUs
+            timeout: maximum duration of a single command in seconds, no limit
+                     if None
+            quiet: stream output of commands at debug level instead of info
+            profiler: profiler recording a span per command, in a lane per
+                      job
+            artifacts: cache restoring outputs of jobs instead of running
+                       their commands, no cache if None
+        """
+        self.logger = logger
+        self.concurrency = concurrency or os.cpu_count() or 1
+        self.timeout = timeout
+        self.quiet = quiet
+        self.profiler = profiler or Profiler()
+        self.artifacts = artifacts
+        self.jobs = []
+        self.completed = set()
+
+    # pylint: disable=R0913
+    def add(
+        self,
+        label: str,
+        commands: list,
+        cwd: str,
+        moves: list = None,
+        unit: tuple = None,
+        env: dict = None,
+        artifacts: dict = None,
+    ) -> None:
+        """Add a job to be run by the next call to `run()`.
+
+        Args:
+            label: label identifying the job in logs and errors
+            commands: list of tuples `(message, cmd)` run one after the other,
+                      `message` being logged before running `cmd`, `cmd`
+                      being either a command line or an object with an
+                      async `run(scheduler, job)` method, like `LatexDriver`
+            cwd: working directory of the commands
+            moves: list of tuples `(action, src, dest)`, `action` being either
+                   `copy` or `move`, applied once all commands succeeded
+            unit: build unit, i.e. tuple `(build_type, locale)`, the job
+                  belongs to
+            env: environment variables of the commands, the current
+                 environment if None
+            artifacts: dictionary with the `spec` of the inputs, as given to
+                       `ArtifactCache.key()`, the `base` directory and the
+                       `outputs` of the commands, restored from the artifact
+                       cache instead of running them
+        """
+        self.jobs.append(
+            {
+                "label": label,
+                "commands": commands,
+                "cwd": cwd,
+                "moves": moves or [],
+                "unit": unit,
+                "env": env,
+                "artifacts": artifacts,
+            }
+        )
+
+    def pop_jobs(self) -> list:
+        """Remove and return the jobs not run yet.
+
+        Used to forward jobs created in a worker process to the main one.
+
+        Returns:
+            List of jobs as added by `add()`
+        """
+        jobs = self.jobs
+        self.jobs = []
+        return jobs
+
+    def run(self) -> None:
+        """Run every pending job and wait for them to finish.
+
+        Raises:
+            JobError: the first job which failed, other jobs being cancelled
+        """
+        if not self.jobs:
+            return
+        jobs = self.pop_jobs()
+        # pylint: disable=C0415
+        import asyncio
+
+        asyncio.run(self.run_jobs(jobs))
+
+    async def run_jobs(self, jobs: list) -> None:
+        """Run jobs concurrently, cancelling all of them on first failure.
+
+        Args:
+            jobs: list of jobs as added by `add()`
+        """
+        # pylint: disable=C0415
+        import asyncio
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks = [
+            asyncio.create_task(self.run_job(i_job, semaphore))
+            for i_job in jobs
+        ]
+        try:
+            done, _ = await asyncio.wait(
+                tasks, return_when=asyncio.FIRST_EXCEPTION
+            )
+            for i_task in done:
+                i_task.result()
+        finally:
+            for i_task in tasks:
+                i_task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def run_job(self, job: dict, semaphore: asyncio.Semaphore) -> None:
+        """Restore the outputs of a job, or run its commands.
+
+        Args:
+            job: job as added by `add()`
+            semaphore: semaphore limiting the number of concurrent commands
+        """
+        # pylint: disable=C0415
+        import asyncio
+
+        build_type, curr_locale = job["unit"] or (None, None)
+        key = None
+        if self.artifacts and job["artifacts"]:
+            with self.profiler.span(
+                "artifacts",
+                lane=job["label"],
+                build_type=build_type,
+                locale=curr_locale,
+            ):
+                key = await asyncio.to_thread(
+                    self.artifacts.key, job["artifacts"]["spec"]
+                )
+                restored = await asyncio.to_thread(
+                    self.artifacts.fetch, key, job["artifacts"]["base"]
+                )
+            if restored is not None:
+                self.logger.info(
+                    "[%s] Restored from the artifact cache.", job["label"]
+                )
+                self.run_moves(job)
+                return
+        await self.run_commands(job, semaphore)
+        if key:
+            await asyncio.to_thread(
+                self.artifacts.publish,
+                key,
+                job["artifacts"]["base"],
+                job["artifacts"]["outputs"],
+            )
+        self.run_moves(job)
+
+    async def run_commands(
+        self, job: dict, semaphore: asyncio.Semaphore
+    ) -> None:
+        """Run the commands of a job one after the other.
+
+        Args:
+            job: job as added by `add()`
+            semaphore: semaphore limiting the number of concurrent commands
+        """
+        build_type, curr_locale = job["unit"] or (None, None)
+        for message, cmd in job["commands"]:
+            async with semaphore:
+                self.logger.info(message)
+                with self.profiler.span(
+                    (
+                        os.path.basename(cmd[0])
+                        if isinstance(cmd, list)
+                        else "lualatex"
+                    ),
+                    lane=job["label"],
+                    build_type=build_type,
+                    locale=curr_locale,
+                ):
+                    if isinstance(cmd, list):
+                        await self.run_command(job, cmd)
+                    else:
+                        await cmd.run(self, job)
+
+    def run_moves(self, job: dict) -> None:
+        """Apply the moves of a job once its outputs are produced.
+
+        Args:
+            job: job as added by `add()`
+        """
+        build_type, curr_locale = job["unit"] or (None, None)
+        with self.profiler.span(
+            "moves",
+            lane=job["label"],
+            build_type=build_type,
+            locale=curr_locale,
+        ):
+            for action, src, dest in job["moves"]:
+                if action == "move":
+                    shutil.move(src, dest)
+                else:
+                    shutil.copy(src, dest)
+        self.completed.add(job["label"])
+
+    async def run_command(self, job: dict, cmd: list) -> None:
+        """Run a single command, streaming its output to the logger.
+
+        Args:
+            job: job the command belongs to
+            cmd: command to run
+
+        Raises:
+            JobError: if the command exit with non-zero code or times out
+        """
+        # pylint: disable=C0415
+        import asyncio
+
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            cwd=job["cwd"],
+            env=job["env"],
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+        )
+        output = collections.deque(maxlen=self.OUTPUT_TAIL)
+        try:
+            await asyncio.wait_for(
+                self.stream_output(job, process, output), self.timeout
+            )
+        except asyncio.TimeoutError as error:
+            await self.kill(process)
+            raise JobError(
+                job["label"],
+                f"`{cmd[0]}` timed out after {self.timeout} seconds",
+                list(output),
+            ) from error
+        except asyncio.CancelledError:
+            await self.kill(process)
+            raise
+        if process.returncode:
+            raise JobError(
+                job["label"],
+                f"`{cmd[0]}` exited with code {process.returncode}",
+                list(output),
+            )
+
+    async def stream_output(
+        self,
+        job: dict,
+        process: Process,
+        output: collections.deque,
+    ) -> None:
+        """Log output of a process line by line until it exits.
+
+        Args:
+            job: job the process belongs to
+            process: running process
+            output: deque storing the last lines output
+        """
+        level = logging.DEBUG if self.quiet else logging.INFO
+        async for line in process.stdout:
+            line = line.decode("UTF-8", errors="replace").rstrip()
+            output.append(line)
+            self.logger.log(level, "[%s] %s", job["label"], line)
+        await process.wait()
+
+    @staticmethod
+    async def kill(process: Process) -> None:
+        """Kill a process if still running and wait for it.
+
+        Args:
+            process: process to kill
+        """
+        if process.returncode is None:
+            process.kill()
+        await process.wait()
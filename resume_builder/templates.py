@@ -0,0 +1,112 @@
+"""Jinja2 loader and persistent cache of compiled templates.
+
+Templates are compiled once per content rather than once per locale and per
+run: compiled bytecode is stored in the cache directory under a hash of the
+template filename and source, so unchanged templates are loaded from the
+cache by later builds, and by every process of a parallel build.
+
+Templates are loaded by a loader recording every template it loads, which
+are inputs of the build units recorded in the build manifest.
+
+As this module imports jinja2, it is only imported by the builder once a
+template has to be rendered.
+"""
+
+# Python Core Library
+# -----------------------------------------------------------------------------
+# https://docs.python.org/3/library/hashlib.html
+# Secure hashes and message digests
+import hashlib
+
+# https://docs.python.org/3/library/os.html
+# Miscellaneous operating system interfaces
+import os
+
+# Third-Party Library
+# -----------------------------------------------------------------------------
+# A very fast and expressive template engine.
+import jinja2
+from jinja2.bccache import Bucket
+
+
+class BytecodeCache(jinja2.FileSystemBytecodeCache):
+    """File system bytecode cache keyed by template source hash."""
+
+    def __init__(self, directory: str) -> None:
+        """Initialize BytecodeCache objects.
+
+        Args:
+            directory: directory where compiled templates are stored
+        """
+        os.makedirs(directory, exist_ok=True)
+        super().__init__(directory, "%s.jinja")
+
+    def get_bucket(
+        self,
+        environment: jinja2.Environment,
+        name: str,
+        filename: str,
+        source: str,
+    ) -> Bucket:
+        """Return the bucket storing the compiled template, loaded if cached.
+
+        Args:
+            environment: jinja2 environment compiling the template
+            name: name of the template
+            filename: path of the template
+            source: source of the template
+
+        Returns:
+            Bucket of the template
+        """
+        key = hashlib.sha256(
+            f"{filename}\0{source}".encode("UTF-8")
+        ).hexdigest()
+        bucket = Bucket(environment, key, self.get_source_checksum(source))
+        self.load_bytecode(bucket)
+        return bucket
+
+    def dump_bytecode(self, bucket: Bucket) -> None:
+        """Store a compiled template atomically.
+
+        Processes of a parallel build may compile the same template at the
+        same time, so a process never reads a partially written file.
+
+        Args:
+            bucket: bucket of the compiled template
+        """
+        filename = self._get_cache_filename(bucket)
+        with open(f"{filename}.{os.getpid()}", "wb") as cache_file:
+            bucket.write_bytecode(cache_file)
+        os.replace(f"{filename}.{os.getpid()}", filename)
+
+
+class DependencyLoader(jinja2.FileSystemLoader):
+    """Jinja2 file system loader which records every template it loads.
+
+    As templates are loaded lazily, this also records templates pulled in
+    through dynamic `include` such as the sections of `index.html.j2`.
+    """
+
+    def __init__(self, searchpath: str) -> None:
+        """Initialize DependencyLoader objects.
+
+        Args:
+            searchpath: directory in which templates are searched
+        """
+        super().__init__(searchpath)
+        self.loaded = set()
+
+    def get_source(self, environment: jinja2.Environment, template: str):
+        """Load a template source and record its filename.
+
+        Args:
+            environment: jinja2 environment loading the template
+            template: name of the template to load
+
+        Returns:
+            Tuple `(source, filename, uptodate)` as expected by jinja2
+        """
+        source, filename, uptodate = super().get_source(environment, template)
+        self.loaded.add(filename)
+        return source, filename, uptodate
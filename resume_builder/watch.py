@@ -0,0 +1,483 @@
+"""Rebuild the resume when its sources change and serve it with live reload.
+
+Source directories are watched with inotify, through `ctypes` so no extra
+dependency is required, or by polling modification times of their files when
+inotify is not available. Once the first build is done, each batch of changes
+triggers an incremental build, which only rebuilds the (locale, build type)
+units depending on the changed files.
+
+The html output is served by an asyncio HTTP server running in the process,
+which injects a small script in every served page. This script listens to
+server-sent events and reloads the page once a rebuild is done.
+"""
+
+# Python Core Library
+# -----------------------------------------------------------------------------
+# https://docs.python.org/3/library/asyncio.html
+# Asynchronous I/O
+import asyncio
+
+# https://docs.python.org/3/library/ctypes.html
+# A foreign function library for Python
+import ctypes
+import ctypes.util
+
+# https://docs.python.org/3/library/fnmatch.html
+# Unix filename pattern matching
+import fnmatch
+
+# https://docs.python.org/3/library/logging.html
+# Logging facility for Python
+import logging
+
+# https://docs.python.org/3/library/mimetypes.html
+# Map filenames to MIME types
+import mimetypes
+
+# https://docs.python.org/3/library/os.html
+# Miscellaneous operating system interfaces
+import os
+
+# https://docs.python.org/3/library/select.html
+# Waiting for I/O completion
+import select
+
+# https://docs.python.org/3/library/struct.html
+# Interpret bytes as packed binary data
+import struct
+
+# https://docs.python.org/3/library/time.html
+# Time access and conversions
+import time
+
+# https://docs.python.org/3/library/urllib.parse.html
+# Parse URLs into components
+from urllib.parse import unquote, urlsplit
+
+# Files written by the build itself or by editors, which must not trigger a
+# rebuild
+IGNORE_PATTERNS = ["*.mo", "*.swp", "*.swx", "*~", ".#*", "4913"]
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+)
+EVENT_STRUCT = struct.Struct("iIII")
+
+LIVE_RELOAD_URL = "/__livereload"
+LIVE_RELOAD_SCRIPT = (
+    "<script>new EventSource("
+    + f'"{LIVE_RELOAD_URL}"'
+    + ").onmessage=function(){location.reload()}</script>"
+).encode("UTF-8")
+
+
+def ignored(path: str) -> bool:
+    """Tell if a change of a file must not trigger a rebuild.
+
+    Args:
+        path: path of the changed file
+
+    Returns:
+        True if the file is generated by the build or is a temporary file of
+        an editor
+    """
+    name = os.path.basename(path)
+    return any(
+        fnmatch.fnmatch(name, i_pattern) for i_pattern in IGNORE_PATTERNS
+    )
+
+
+class FileWatcher:
+    """Report files changed under a list of directories."""
+
+    def __init__(self, paths: list, debounce: float = 0.05) -> None:
+        """Initialize FileWatcher objects.
+
+        Args:
+            paths: directories to watch recursively
+            debounce: delay, in seconds, without changes before a batch of
+                      changes is reported, as saving a file often emits
+                      several events
+        """
+        self.paths = [i_path for i_path in paths if os.path.isdir(i_path)]
+        self.debounce = debounce
+        self.inotify_fd = None
+        self.watches = {}
+        self.snapshot = {}
+        libc_name = ctypes.util.find_library("c")
+        libc = ctypes.CDLL(libc_name, use_errno=True) if libc_name else None
+        if libc is not None and hasattr(libc, "inotify_init1"):
+            self.libc = libc
+            self.inotify_fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.inotify_fd is not None and self.inotify_fd >= 0:
+            for i_path in self.paths:
+                self.add_tree(i_path)
+        else:
+            self.inotify_fd = None
+            self.snapshot = self.scan()
+
+    @property
+    def backend(self) -> str:
+        """Return the name of the mechanism used to detect changes."""
+        return "inotify" if self.inotify_fd is not None else "polling"
+
+    def close(self) -> None:
+        """Release the inotify file descriptor."""
+        if self.inotify_fd is not None:
+            os.close(self.inotify_fd)
+            self.inotify_fd = None
+
+    def add_tree(self, path: str) -> None:
+        """Watch a directory and all its subdirectories with inotify.
+
+        Args:
+            path: directory to watch
+        """
+        for root, _, _ in os.walk(path, followlinks=True):
+            descriptor = self.libc.inotify_add_watch(
+                self.inotify_fd, os.fsencode(root), WATCH_MASK
+            )
+            if descriptor >= 0:
+                self.watches[descriptor] = root
+
+    def scan(self) -> dict:
+        """Return modification time and size of every watched file.
+
+        Returns:
+            Dictionary mapping path of files to `(mtime_ns, size)`
+        """
+        snapshot = {}
+        for i_path in self.paths:
+            for root, _, filenames in os.walk(i_path, followlinks=True):
+                for i_file in filenames:
+                    path = os.path.join(root, i_file)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def read_events(self, timeout: float) -> set:
+        """Return files changed according to inotify events.
+
+        Args:
+            timeout: maximum duration, in seconds, to wait for an event
+
+        Returns:
+            Set of changed paths, empty if no event was received
+        """
+        changed = set()
+        readable, _, _ = select.select([self.inotify_fd], [], [], timeout)
+        if not readable:
+            return changed
+        try:
+            buffer = os.read(self.inotify_fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset < len(buffer):
+            descriptor, mask, _, length = EVENT_STRUCT.unpack_from(
+                buffer, offset
+            )
+            offset += EVENT_STRUCT.size
+            name = buffer[offset : offset + length].rstrip(b"\0")
+            offset += length
+            path = os.path.join(
+                self.watches.get(descriptor, ""), os.fsdecode(name)
+            )
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    self.add_tree(path)
+                continue
+            changed.add(path)
+        return changed
+
+    def poll(self, timeout: float) -> set:
+        """Return files changed according to their modification time.
+
+        Args:
+            timeout: maximum duration, in seconds, to wait for a change
+
+        Returns:
+            Set of changed paths, empty if nothing changed
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            snapshot = self.scan()
+            changed = {
+                i_path
+                for i_path in set(snapshot) | set(self.snapshot)
+                if snapshot.get(i_path) != self.snapshot.get(i_path)
+            }
+            self.snapshot = snapshot
+            remaining = deadline - time.monotonic()
+            if changed or remaining <= 0:
+                return changed
+            time.sleep(min(0.5, remaining))
+
+    def wait(self, timeout: float = 1) -> set:
+        """Wait for a batch of changes.
+
+        Args:
+            timeout: maximum duration, in seconds, to wait for a first change
+
+        Returns:
+            Set of changed files, empty if nothing changed before the timeout
+        """
+        read = self.read_events if self.inotify_fd is not None else self.poll
+        changed = read(timeout)
+        if changed:
+            while True:
+                more = read(self.debounce)
+                if not more:
+                    break
+                changed |= more
+        return {i_path for i_path in changed if not ignored(i_path)}
+
+
+class LiveReloadServer:
+    """Serve a directory over HTTP and notify pages when they change."""
+
+    def __init__(
+        self,
+        root: str,
+        logger: logging.Logger,
+        port: int = 8080,
+        live_reload: bool = True,
+    ) -> None:
+        """Initialize LiveReloadServer objects.
+
+        Args:
+            root: directory to serve
+            logger: logger used to report served requests
+            port: port to listen to, on every interfaces
+            live_reload: tell if pages should reload once notified
+        """
+        self.root = os.path.realpath(root)
+        self.logger = logger
+        self.port = port
+        self.live_reload = live_reload
+        self.clients = set()
+
+    async def start(self) -> asyncio.AbstractServer:
+        """Start listening to HTTP requests.
+
+        Returns:
+            The asyncio server
+        """
+        server = await asyncio.start_server(self.handle, port=self.port)
+        # pylint: disable=W1203
+        self.logger.info(
+            f"Serving {self.root} on http://localhost:{self.port}/"
+        )
+        return server
+
+    def notify(self) -> None:
+        """Tell every connected page to reload."""
+        for i_queue in self.clients:
+            i_queue.put_nowait("reload")
+
+    def resolve(self, url: str) -> str:
+        """Return the file served for an URL.
+
+        Args:
+            url: URL path requested
+
+        Returns:
+            Path of the file to serve, None if it does not exist or is outside
+            the served directory
+        """
+        path = os.path.realpath(
+            os.path.join(self.root, unquote(urlsplit(url).path).lstrip("/"))
+        )
+        if path != self.root and not path.startswith(self.root + os.sep):
+            return None
+        if os.path.isdir(path):
+            path = os.path.join(path, "index.html")
+        return path if os.path.isfile(path) else None
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Answer a single HTTP request.
+
+        Args:
+            reader: stream of the request
+            writer: stream of the response
+        """
+        try:
+            request = await reader.readuntil(b"\r\n\r\n")
+            method, url = request.decode("latin-1").split(" ", 2)[:2]
+            if method not in ("GET", "HEAD"):
+                await self.respond(writer, 405, b"Method Not Allowed")
+            elif url == LIVE_RELOAD_URL and self.live_reload:
+                await self.stream_events(writer)
+            else:
+                await self.serve_file(writer, url, method == "HEAD")
+        except (
+            asyncio.IncompleteReadError,
+            asyncio.LimitOverrunError,
+            ConnectionError,
+            ValueError,
+        ):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def respond(
+        writer: asyncio.StreamWriter,
+        status: int,
+        body: bytes,
+        content_type: str = "text/plain",
+        head: bool = False,
+    ) -> None:
+        """Write a complete HTTP response.
+
+        Args:
+            writer: stream of the response
+            status: HTTP status code
+            body: content of the response
+            content_type: MIME type of the content
+            head: tell if the body must be omitted
+        """
+        writer.write(
+            (
+                f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                + f"Content-Type: {content_type}\r\n"
+                + f"Content-Length: {len(body)}\r\n"
+                + "Cache-Control: no-cache\r\n"
+                + "Connection: close\r\n\r\n"
+            ).encode("latin-1")
+        )
+        if not head:
+            writer.write(body)
+        await writer.drain()
+
+    async def serve_file(
+        self, writer: asyncio.StreamWriter, url: str, head: bool
+    ) -> None:
+        """Answer with the content of a file of the served directory.
+
+        Pages are served with the live reload script injected.
+
+        Args:
+            writer: stream of the response
+            url: URL path requested
+            head: tell if the body must be omitted
+        """
+        path = self.resolve(url)
+        if path is None:
+            await self.respond(writer, 404, b"Not Found")
+            return
+        with open(path, "rb") as served_file:
+            body = served_file.read()
+        content_type = (
+            mimetypes.guess_type(path)[0] or "application/octet-stream"
+        )
+        if content_type == "text/html":
+            if self.live_reload:
+                index = body.rfind(b"</body>")
+                index = index if index >= 0 else len(body)
+                body = body[:index] + LIVE_RELOAD_SCRIPT + body[index:]
+            content_type = "text/html; charset=utf-8"
+        await self.respond(writer, 200, body, content_type, head)
+
+    async def stream_events(self, writer: asyncio.StreamWriter) -> None:
+        """Keep a connection open to send reload events to a page.
+
+        Args:
+            writer: stream of the response
+        """
+        queue = asyncio.Queue()
+        self.clients.add(queue)
+        try:
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                + b"Content-Type: text/event-stream\r\n"
+                + b"Cache-Control: no-cache\r\n\r\n"
+            )
+            await writer.drain()
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), 15)
+                    writer.write(f"data: {event}\n\n".encode("UTF-8"))
+                except asyncio.TimeoutError:
+                    # Comments keep the connection open through proxies
+                    writer.write(b": keep-alive\n\n")
+                await writer.drain()
+        finally:
+            self.clients.discard(queue)
+
+
+async def watch(
+    watcher: FileWatcher,
+    rebuild,
+    logger: logging.Logger,
+    server: LiveReloadServer = None,
+) -> None:
+    """Rebuild on every change of the watched files until interrupted.
+
+    Args:
+        watcher: watcher of the source directories
+        rebuild: callable rebuilding the resume, receiving the changed files
+        logger: logger used to report rebuilds
+        server: server whose pages are notified after each rebuild, if any
+    """
+    loop = asyncio.get_running_loop()
+    http_server = await server.start() if server else None
+    # pylint: disable=W1203
+    logger.info(f"Watching {', '.join(watcher.paths)} ({watcher.backend}).")
+    try:
+        while True:
+            changed = await loop.run_in_executor(None, watcher.wait)
+            if not changed:
+                continue
+            # pylint: disable=W1203
+            logger.info(
+                f"Rebuilding after changes of {', '.join(sorted(changed))}."
+            )
+            start = time.monotonic()
+            try:
+                await loop.run_in_executor(None, rebuild, changed)
+            # pylint: disable=W0703
+            except Exception as error:
+                # pylint: disable=W1203
+                logger.error(f"Rebuild failed: {error!r}")
+                continue
+            # pylint: disable=W1203
+            logger.info(f"Rebuilt in {time.monotonic() - start:.2f}s.")
+            if server:
+                server.notify()
+    finally:
+        if http_server:
+            http_server.close()
+        watcher.close()
+
+
+async def serve(server: LiveReloadServer) -> None:
+    """Serve the output until interrupted.
+
+    Args:
+        server: server of the html output
+    """
+    http_server = await server.start()
+    async with http_server:
+        await http_server.serve_forever()
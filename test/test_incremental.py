@@ -0,0 +1,73 @@
+"""Check incremental builds of post-processed html outputs."""
+
+# Python Core Library
+# -----------------------------------------------------------------------------
+# https://docs.python.org/3/library/json.html
+# JSON encoder and decoder
+import json
+
+# https://docs.python.org/3/library/logging.html
+# Logging facility for Python
+import logging
+
+# Local Library
+# -----------------------------------------------------------------------------
+# Builder of the resume
+import main
+
+
+def build_html(output_dir: str, cache_dir: str, options: list) -> list:
+    """Build the html resume incrementally.
+
+    Args:
+        output_dir: directory where built files are stored
+        cache_dir: directory where data reused between builds are stored
+        options: other command line options of the build
+
+    Returns:
+        List of the files changed by the build, relative to the output
+        directory
+    """
+    args = main.parse_arg(
+        ["--incremental", "--jobs", "1", "--cache-dir", cache_dir, *options]
+    )
+    args.output_dir = output_dir
+    builder = main.ResumeBuilder(args)
+    builder.logger.setLevel(logging.WARNING)
+    builder.build(html=True, pdf=False, tex=False)
+    with open(builder.output_changes.path, "r", encoding="UTF-8") as changes:
+        return json.load(changes)["changed"]
+
+
+def check_build_settles(tmp_path, options: list) -> None:
+    """Check a second build of post-processed pages changes no file.
+
+    Args:
+        tmp_path: temporary directory where the resume is built
+        options: post-render options of the build
+    """
+    output_dir = str(tmp_path / "output")
+    cache_dir = str(tmp_path / "cache")
+    assert build_html(output_dir, cache_dir, options)
+    assert not build_html(output_dir, cache_dir, options)
+
+
+def test_optimized_build_settles(tmp_path):
+    """Check a second build of optimized pages changes no file."""
+    check_build_settles(tmp_path, ["--optimize-html"])
+
+
+def test_fingerprinted_build_settles(tmp_path):
+    """Check a second build of optimized and fingerprinted pages is a no-op."""
+    check_build_settles(tmp_path, ["--optimize-html", "--fingerprint-assets"])
+
+
+def test_fingerprinted_assets_replace_plain_ones(tmp_path):
+    """Check assets are only published under their fingerprinted name."""
+    output_dir = tmp_path / "output"
+    for _ in range(2):
+        build_html(
+            str(output_dir), str(tmp_path / "cache"), ["--fingerprint-assets"]
+        )
+        assert not (output_dir / "html" / "css" / "style.css").exists()
+        assert list((output_dir / "html" / "css").glob("style.*.css"))